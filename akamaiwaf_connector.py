@@ -5,13 +5,25 @@
 # Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
 #
 # Phantom App imports
+import bisect
+import codecs
+import contextlib
+import fcntl
+import hashlib
 import ipaddress
+import itertools
 import json
+import os
+import random
+import re
+import socket
 import sys
+import threading
+import time
+import zlib
+from datetime import datetime
 
 import phantom.app as phantom
-import requests
-from bs4 import BeautifulSoup
 from phantom.action_result import ActionResult
 from phantom.base_connector import BaseConnector
 
@@ -23,8 +35,10 @@ try:
     from urllib import unquote
 except:
     from urllib.parse import unquote
-# Import Akamai Edgegrid authentication module
-from akamai.edgegrid import EdgeGridAuth
+
+
+IPV4_ELEMENT_REGEX = re.compile(IPV4_ELEMENT_PATTERN)
+GEO_ELEMENT_REGEX = re.compile(GEO_ELEMENT_PATTERN)
 
 
 class RetVal(tuple):
@@ -32,6 +46,92 @@ class RetVal(tuple):
         return tuple.__new__(RetVal, (val1, val2))
 
 
+class RequestTimings:
+    """Adds up the time the REST calls of an action run spend in each phase. The concurrent calls of an action share it,
+    so the phases of concurrent calls can add up to more than the action took, the wall time with at least one call
+    in progress is kept apart to tell the time spent outside of the REST calls. The request and response body bytes
+    that went over the wire, compressed when they were, are added up too.
+    """
+
+    def __init__(self):
+        self.num_requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.phases = dict.fromkeys(TIMING_PHASES, 0.0)
+        self.busy_seconds = 0.0
+        self._busy = 0
+        self._busy_since = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] += seconds
+
+        if phase == "connect":
+            self._local.connect_seconds = self.get_thread_connect_seconds() + seconds
+
+    def add_request(self, ttfb_seconds):
+        with self._lock:
+            self.num_requests += 1
+            self.phases["ttfb"] += ttfb_seconds
+
+    def add_bytes(self, sent=0, received=0):
+        with self._lock:
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def get_thread_connect_seconds(self):
+        return getattr(self._local, "connect_seconds", 0.0)
+
+    @contextlib.contextmanager
+    def measure(self, phase=None):
+        """Counts the time spent in the block as REST call time, and in the phase when one is given."""
+        start = time.perf_counter()
+        with self._lock:
+            if not self._busy:
+                self._busy_since = start
+            self._busy += 1
+
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                if phase:
+                    self.phases[phase] += end - start
+                self._busy -= 1
+                if not self._busy:
+                    self.busy_seconds += end - self._busy_since
+
+    def get_summary(self, action_seconds):
+        summary = {"num_requests": self.num_requests, "bytes_sent": self.bytes_sent, "bytes_received": self.bytes_received}
+        for phase, seconds in self.phases.items():
+            summary[f"{phase}_seconds"] = round(seconds, 3)
+        summary["post_processing_seconds"] = round(max(action_seconds - self.busy_seconds, 0), 3)
+        summary["action_seconds"] = round(action_seconds, 3)
+        return summary
+
+
+class ContentDecoder:
+    """Decompresses a response body one chunk at a time as it is read, when it has the Content-Encoding the app asks for,
+    and counts the bytes read before decompression.
+    """
+
+    def __init__(self, headers):
+        self.bytes_read = 0
+        content_encoding = (headers.get("Content-Encoding") or "").strip().lower()
+        # wbits of 16 + MAX_WBITS expects the gzip header and trailer
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if content_encoding in ("gzip", "x-gzip") else None
+
+    def decode(self, chunk):
+        self.bytes_read += len(chunk)
+        return self._decompressor.decompress(chunk) if self._decompressor else chunk
+
+    def flush(self):
+        return self._decompressor.flush() if self._decompressor else b""
+
+
 class AkamaiNetworkListsConnector(BaseConnector):
     def __init__(self):
         # Call the BaseConnectors init first
@@ -42,8 +142,31 @@ class AkamaiNetworkListsConnector(BaseConnector):
         self._client_token = None
         self._client_secret = None
         self._access_token = None
-
-    def _validate_integer(self, action_result, parameter, key):
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._compress_requests = False
+        self._pool_size = None
+        self._max_concurrency = None
+        self._cache_ttl = None
+        self._cache_max_entries = None
+        self._cache = None
+        self._cache_changed = False
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._max_retries = None
+        self._max_rebases = None
+        self._connect_timeout = None
+        self._read_timeout = None
+        self._rate_limit = None
+        self._rate_burst = None
+        self._rate_limit_lock = threading.Lock()
+        self._debug_failures_only = False
+        self._debug_body_limit = None
+        self._profile_actions = False
+        self._timings = RequestTimings()
+
+    def _validate_integer(self, action_result, parameter, key, allow_zero=True):
         if parameter is not None:
             try:
                 if not float(parameter).is_integer():
@@ -56,6 +179,9 @@ class AkamaiNetworkListsConnector(BaseConnector):
             if parameter < 0:
                 return action_result.set_status(phantom.APP_ERROR, NON_NEGATIVE_INTEGER_MSG.format(key)), None
 
+            if not allow_zero and parameter == 0:
+                return action_result.set_status(phantom.APP_ERROR, POSITIVE_INTEGER_MSG.format(key)), None
+
         return phantom.APP_SUCCESS, parameter
 
     def _get_error_message_from_exception(self, e):
@@ -113,6 +239,9 @@ class AkamaiNetworkListsConnector(BaseConnector):
         status_code = response.status_code
 
         try:
+            # Only error pages are HTML, so the parser is imported when one comes back
+            from bs4 import BeautifulSoup
+
             soup = BeautifulSoup(response.text, "html.parser")
             for element in soup(["script", "style", "footer", "nav"]):
                 element.extract()
@@ -129,9 +258,10 @@ class AkamaiNetworkListsConnector(BaseConnector):
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
     def _process_json_response(self, r, action_result):
-        # Try a json parse
+        # Try a json parse, straight from the response bytes so no decoded copy of the body is kept around
         try:
-            resp_json = r.json()
+            with self._timings.measure("parse"):
+                resp_json = json.loads(r.content)
         except Exception as e:
             error = self._get_error_message_from_exception(e)
             return RetVal(action_result.set_status(phantom.APP_ERROR, f"Unable to parse JSON response. Error: {error}"), None)
@@ -151,65 +281,550 @@ class AkamaiNetworkListsConnector(BaseConnector):
         return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
     def _process_response(self, r, action_result):
-        # store the r_text in debug data, it will get dumped in the logs if the action fails
-        if hasattr(action_result, "add_debug_data"):
-            action_result.add_debug_data({"r_status_code": r.status_code})
-            action_result.add_debug_data({"r_text": r.text})
-            action_result.add_debug_data({"r_headers": r.headers})
-
         # Process each 'Content-Type' of response separately
 
         # Process a json response
         if "json" in r.headers.get("Content-Type", ""):
-            return self._process_json_response(r, action_result)
+            ret_val, response = self._process_json_response(r, action_result)
 
-        if "html" in r.headers.get("Content-Type", ""):
-            return self._process_html_response(r, action_result)
+        elif "html" in r.headers.get("Content-Type", ""):
+            ret_val, response = self._process_html_response(r, action_result)
 
         # it's not content-type that is to be parsed, handle an empty response
-        if not r.text:
-            return self._process_empty_response(r, action_result)
+        elif not r.content:
+            ret_val, response = self._process_empty_response(r, action_result)
 
         # everything else is actually an error at this point
-        message = "Can't process response from server. Status Code: {} Data from server: {}".format(
-            r.status_code, r.text.replace("{", "{{").replace("}", "}}")
-        )
+        else:
+            message = "Can't process response from server. Status Code: {} Data from server: {}".format(
+                r.status_code, r.text.replace("{", "{{").replace("}", "}}")
+            )
+            ret_val, response = RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
 
-        return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
+        # store the r_text in debug data, it will get dumped in the logs if the action fails
+        if phantom.is_fail(ret_val) or not self._debug_failures_only:
+            self._add_response_debug_data(r, action_result)
+
+        return RetVal(ret_val, response)
+
+    def _add_response_debug_data(self, r, action_result):
+        """This function is used to store the response in the debug data, truncated to the configured number of bytes.
+        :param r: response object
+        :param action_result: object of ActionResult class
+        """
+        if not hasattr(action_result, "add_debug_data"):
+            return
+
+        if self._debug_body_limit and len(r.content) > self._debug_body_limit:
+            r_text = "{}... [truncated {} of {} bytes]".format(
+                r.content[: self._debug_body_limit].decode(r.encoding or "utf-8", errors="replace"),
+                len(r.content) - self._debug_body_limit,
+                len(r.content),
+            )
+        else:
+            r_text = r.text
+
+        action_result.add_debug_data({"r_status_code": r.status_code})
+        action_result.add_debug_data({"r_text": r_text})
+        action_result.add_debug_data({"r_headers": r.headers})
+
+    def _create_session(self, config):
+        """This function is used to create the HTTP session shared by every REST call of the connector run.
+        :param config: Dictionary of asset configuration
+        :return: requests session with EdgeGrid authentication and a pooled adapter mounted
+        """
+        import requests
+        from akamai.edgegrid import EdgeGridAuth
+
+        session = requests.Session()
+        session.auth = EdgeGridAuth(client_token=self._client_token, client_secret=self._client_secret, access_token=self._access_token)
+        session.verify = config.get("akamai_verify_ssl", False)
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size)
+        self._time_connections(adapter)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        if not config.get("keep_alive", True):
+            session.headers["Connection"] = "close"
+
+        return session
+
+    def _get_session(self):
+        """This function is used to get the HTTP session of the connector run. It is created by the first REST call,
+        so actions that fail before calling the API do not import and set up the HTTP stack.
+        :return: requests session with EdgeGrid authentication
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session(self.get_config())
+
+        return self._session
+
+    def _time_connections(self, adapter):
+        """This function is used to make the connection pools of an adapter add the time spent opening connections,
+        the TCP and TLS handshakes, to the connect phase of the request timings.
+        :param adapter: requests HTTPAdapter
+        """
+        connector = self
+        pool_classes = {}
+
+        for scheme, pool_class in adapter.poolmanager.pool_classes_by_scheme.items():
+            connection_class = pool_class.ConnectionCls
+
+            def connect(connection, connection_class=connection_class):
+                start = time.perf_counter()
+                try:
+                    connection_class.connect(connection)
+                finally:
+                    connector._timings.add("connect", time.perf_counter() - start)
+
+            timed_connection_class = type(f"Timed{connection_class.__name__}", (connection_class,), {"connect": connect})
+            pool_classes[scheme] = type(f"Timed{pool_class.__name__}", (pool_class,), {"ConnectionCls": timed_connection_class})
+
+        adapter.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def _get_connection_stats(self):
+        """This function is used to count the connections opened and reused by the session connection pools.
+        :return: tuple of (new connections, reused connections)
+        """
+        new_connections = 0
+        requests_sent = 0
+
+        if self._session is None:
+            return new_connections, requests_sent
+
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                new_connections += pool.num_connections
+                requests_sent += pool.num_requests
+
+        return new_connections, max(requests_sent - new_connections, 0)
 
     def _make_rest_call(self, endpoint, action_result, method="get", **kwargs):
         # **kwargs can be any additional parameters that requests.request accepts
-        config = self.get_config()
+        ret_val, r = self._send_request(endpoint, action_result, method=method, **kwargs)
+
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
+
+        return self._process_response(r, action_result)
+
+    def _make_stream_call(self, endpoint, action_result, method="get", **kwargs):
+        """This function is used to make a REST call whose JSON body is read incrementally by the caller.
+        :param endpoint: The endpoint we want to send the request to
+        :param action_result: object of ActionResult class
+        :param method: HTTP method
+        :param kwargs: Any additional parameters that requests.request accepts
+        :return: status success/failure, response object with the unread body, the caller has to close it
+        """
+        ret_val, r = self._send_request(endpoint, action_result, method=method, stream=True, **kwargs)
+
+        if phantom.is_fail(ret_val):
+            return RetVal(ret_val, None)
+
+        if 200 <= r.status_code < 399 and "json" in r.headers.get("Content-Type", ""):
+            return RetVal(phantom.APP_SUCCESS, r)
+
+        # Anything else is read in full and reported the usual way
+        try:
+            self._read_content(r)
+        except Exception as e:
+            r.close()
+            error_message = self._get_error_message_from_exception(e)
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Error Connecting to server. Details: {error_message}"), None)
+
+        ret_val, _ = self._process_response(r, action_result)
+        r.close()
+
+        if phantom.is_success(ret_val):
+            ret_val = action_result.set_status(phantom.APP_ERROR, f"Status Code: {r.status_code}. Expected a JSON response from the server")
+
+        return RetVal(ret_val, None)
+
+    def _iter_json_array(self, r, key, fields=None):
+        """This function is used to parse the items of a top level JSON array from a streamed response one at a time,
+        so only the item being parsed and a part of the body are held in memory.
+        :param r: response object returned by _make_stream_call
+        :param key: Key of the array in the top level object
+        :param fields: Dictionary the other top level fields are added to, the ones after the array once all the items were read
+        :return: generator of the array items
+        """
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+        chunks = self._iter_content(r)
+        buffer = ""
+        position = 0
+
+        def fill(size):
+            # Drop what was parsed and read until at least size characters are left to parse
+            nonlocal buffer, position
+            pieces = [buffer[position:]]
+            available = len(pieces[0])
+            while available < size:
+                with self._timings.measure("download"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pieces.append(text_decoder.decode(chunk))
+                available += len(pieces[-1])
+
+            grew = available > len(pieces[0])
+            buffer = "".join(pieces)
+            position = 0
+            return grew
+
+        def peek():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if not fill(1):
+                    return None
+
+        def expect(character):
+            nonlocal position
+            next_character = peek()
+            if next_character is None:
+                raise ValueError(f"Truncated JSON response while reading '{key}'")
+            if next_character != character:
+                raise ValueError(f"Unexpected JSON in the response while reading '{key}', expected '{character}'")
+            position += 1
+
+        def decode_value():
+            nonlocal position
+            peek()
+            while True:
+                try:
+                    with self._timings.measure("parse"):
+                        value, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    value, end = None, None
+
+                # A number that reaches the end of the buffer, or stops at a character that could continue it, may go on in the next chunk
+                if end is not None and not (type(value) in (int, float) and (end == len(buffer) or buffer[end] in "0123456789.eE+-")):
+                    position = end
+                    return value
+
+                # At least twice as much is read before the value is parsed again, so a large value is parsed a few times, not once per chunk
+                if not fill(max(2 * (len(buffer) - position), 1)):
+                    if end is not None:
+                        position = end
+                        return value
+                    raise ValueError(f"Truncated JSON response while reading '{key}'")
+
+        expect("{")
+        if peek() == "}":
+            return
+
+        while True:
+            name = decode_value()
+            expect(":")
+            if name == key:
+                expect("[")
+                if peek() == "]":
+                    position += 1
+                else:
+                    while True:
+                        yield decode_value()
+                        if peek() == "]":
+                            position += 1
+                            break
+                        expect(",")
+            else:
+                value = decode_value()
+                if fields is not None:
+                    fields[name] = value
+
+            if peek() == "}":
+                return
+            expect(",")
+
+    def _iter_content(self, r):
+        """This function is used to read the body of a streamed response in chunks, decompressing it as it is read,
+        and add the bytes read from the connection to the request stats.
+        :param r: response object with the unread body
+        :return: generator of the decompressed chunks
+        """
+        import requests
+        from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+        # urllib3 does not count the bytes of chunked responses, so the body is read as is and decompressed here
+        decoder = ContentDecoder(r.headers)
+        try:
+            for chunk in r.raw.stream(STREAM_CHUNK_SIZE, decode_content=False):
+                chunk = decoder.decode(chunk)
+                if chunk:
+                    yield chunk
+
+            chunk = decoder.flush()
+            if chunk:
+                yield chunk
+        # Raised as the requests exceptions, like iter_content does
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except zlib.error as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        finally:
+            self._timings.add_bytes(received=decoder.bytes_read)
+
+    def _read_content(self, r):
+        """This function is used to read the whole body of a streamed response and keep it on the response.
+        :param r: response object with the unread body
+        """
+        r._content = b"".join(self._iter_content(r))
+        r._content_consumed = True
+
+    def _encode_request_body(self, kwargs):
+        """This function is used to serialize the JSON body of a request without whitespace, and gzip it when
+        'compress_requests' is enabled and the body is large enough to benefit.
+        :param kwargs: Parameters of the request, the json parameter is replaced by the encoded data and headers
+        """
+        if kwargs.get("json") is None:
+            kwargs.pop("json", None)
+            return
+
+        body = json.dumps(kwargs.pop("json"), separators=(",", ":"), allow_nan=False).encode("utf-8")
+        headers = dict(kwargs.get("headers") or {})
+        headers["Content-Type"] = "application/json"
+
+        if self._compress_requests and len(body) >= REQUEST_COMPRESSION_MIN_SIZE:
+            # wbits of 16 + MAX_WBITS writes the gzip header and trailer, zlib.compress only takes wbits from Python 3.11
+            compressor = zlib.compressobj(REQUEST_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            headers["Content-Encoding"] = "gzip"
+
+        kwargs["data"] = body
+        kwargs["headers"] = headers
+
+    def _decompress_rejected_body(self, r, action_result, kwargs):
+        """This function is used to check whether the server rejected a gzip compressed request body, in which case
+        the body is decompressed to be sent again and request compression is turned off for the rest of the run.
+        :param r: response object
+        :param action_result: object of ActionResult class
+        :param kwargs: Parameters of the request, updated in place
+        :return: True if the request has to be sent again
+        """
+        headers = kwargs.get("headers") or {}
+        if r.status_code != 415 or headers.get("Content-Encoding") != "gzip":
+            return False
+
+        self._compress_requests = False
+        kwargs["data"] = zlib.decompress(kwargs["data"], wbits=16 + zlib.MAX_WBITS)
+        kwargs["headers"] = {name: value for name, value in headers.items() if name != "Content-Encoding"}
+        if hasattr(action_result, "add_debug_data"):
+            action_result.add_debug_data({"request_compression": "disabled", "url": r.url, "r_status_code": r.status_code})
 
-        resp_json = None
+        return True
 
+    def _send_request(self, endpoint, action_result, method="get", **kwargs):
+        """This function is used to send a request to the API, retrying throttled and transient failures.
+        :param endpoint: The endpoint we want to send the request to
+        :param action_result: object of ActionResult class
+        :param method: HTTP method
+        :param kwargs: Any additional parameters that requests.request accepts
+        :return: status success/failure, response object
+        """
         try:
-            request_func = getattr(requests, method)
+            request_func = getattr(self._get_session(), method)
         except AttributeError:
-            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Invalid method: {method}"), resp_json)
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Invalid method: {method}"), None)
 
         # Create a URL to connect to
         url = f"{self._base_url}{AKAMAI_API_PATH}{endpoint}"
 
-        try:
-            r = requests.Session()
-            r.auth = EdgeGridAuth(client_token=self._client_token, client_secret=self._client_secret, access_token=self._access_token)
-            print(vars(r))
-            r = request_func(url, auth=r.auth, verify=config.get("akamai_verify_ssl", False), **kwargs)
-        except requests.exceptions.InvalidSchema:
-            error_message = f"Error connecting to server. No connection adapters were found for {url}"
-            return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), resp_json)
-        except requests.exceptions.InvalidURL:
-            error_message = f"Error connecting to server. Invalid URL {url}"
-            return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), resp_json)
-        except requests.exceptions.ConnectionError:
-            error_message = "Error Details: Connection Refused from the Server"
-            return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), resp_json)
-        except Exception as e:
-            error_message = self._get_error_message_from_exception(e)
-            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Error Connecting to server. Details: {error_message}"), resp_json)
+        kwargs.setdefault("timeout", (self._connect_timeout, self._read_timeout))
+        self._encode_request_body(kwargs)
+
+        # The body is always streamed so the time to the first byte and the download are timed apart,
+        # it is read here unless the caller asked for a streamed response
+        stream = kwargs.pop("stream", False)
+
+        with self._timings.measure():
+            return self._send_request_with_retries(url, request_func, action_result, method, stream, **kwargs)
+
+    def _send_request_with_retries(self, url, request_func, action_result, method, stream, **kwargs):
+        """This function is used to send a request, retrying throttled and transient failures, and time its phases.
+        :param url: URL of the request
+        :param request_func: Session method of the HTTP method
+        :param action_result: object of ActionResult class
+        :param method: HTTP method
+        :param stream: Whether the body is left unread for the caller
+        :param kwargs: Any additional parameters that requests.request accepts
+        :return: status success/failure, response object
+        """
+        import requests
 
-        return self._process_response(r, action_result)
+        # Everything but POST can be resent safely after a server error, a throttled request was not processed at all
+        idempotent = method.lower() != "post"
+
+        retries = 0
+        while True:
+            waited = self._acquire_rate_limit_token()
+            if waited:
+                self._timings.add("wait", waited)
+                if hasattr(action_result, "add_debug_data"):
+                    action_result.add_debug_data({"rate_limit_wait": round(waited, 3), "url": url})
+
+            r = None
+            try:
+                connect_seconds = self._timings.get_thread_connect_seconds()
+                start = time.perf_counter()
+                r = request_func(url, stream=True, **kwargs)
+                self._timings.add_request(time.perf_counter() - start - (self._timings.get_thread_connect_seconds() - connect_seconds))
+                self._timings.add_bytes(sent=len(r.request.body or b""))
+
+                if self._decompress_rejected_body(r, action_result, kwargs):
+                    r.close()
+                    continue
+
+                if not stream:
+                    # Reading the content downloads the body and keeps it on the response
+                    with self._timings.measure("download"):
+                        self._read_content(r)
+            except requests.exceptions.InvalidSchema:
+                error_message = f"Error connecting to server. No connection adapters were found for {url}"
+                return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), None)
+            except requests.exceptions.InvalidURL:
+                error_message = f"Error connecting to server. Invalid URL {url}"
+                return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), None)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                # The body may have failed to download after the response came in, it is retried like a failed request
+                if r is not None:
+                    r.close()
+                    r = None
+                if not idempotent or retries >= self._max_retries:
+                    if isinstance(e, requests.exceptions.Timeout):
+                        error_message = f"Error Details: Timeout while waiting for the server after {retries + 1} attempt(s)"
+                    else:
+                        error_message = "Error Details: Connection Refused from the Server"
+                    return RetVal(action_result.set_status(phantom.APP_ERROR, error_message), None)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return RetVal(action_result.set_status(phantom.APP_ERROR, f"Error Connecting to server. Details: {error_message}"), None)
+
+            if r is not None:
+                retryable = r.status_code == 429 or (idempotent and r.status_code in RETRY_STATUS_CODES)
+                if not retryable or retries >= self._max_retries:
+                    break
+
+            delay = self._get_retry_delay(r, retries)
+            retries += 1
+            if hasattr(action_result, "add_debug_data"):
+                action_result.add_debug_data(
+                    {"retry": retries, "url": url, "r_status_code": r.status_code if r is not None else None, "delay": round(delay, 3)}
+                )
+            if r is not None:
+                r.close()
+            time.sleep(delay)
+            self._timings.add("wait", delay)
+
+        if retries and hasattr(action_result, "add_debug_data"):
+            action_result.add_debug_data({"retries": retries, "url": url})
+
+        return RetVal(phantom.APP_SUCCESS, r)
+
+    def _acquire_rate_limit_token(self):
+        """This function is used to take a token from the client side request bucket of the asset, waiting until one is available.
+        The bucket is kept in a file of the app state directory and locked while it is updated, so every concurrently
+        running action of the asset shares it.
+        :return: number of seconds waited
+        """
+        if not self._rate_limit:
+            return 0
+
+        rate = self._rate_limit / 60.0
+        bucket_path = os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_{RATE_LIMIT_FILE_SUFFIX}")
+
+        waited = 0
+        while True:
+            # flock coordinates the processes, the thread lock the workers of this process
+            with self._rate_limit_lock, os.fdopen(os.open(bucket_path, os.O_RDWR | os.O_CREAT, 0o600), "r+") as bucket_file:
+                fcntl.flock(bucket_file, fcntl.LOCK_EX)
+                try:
+                    try:
+                        bucket = json.loads(bucket_file.read() or "{}")
+                    except ValueError:
+                        bucket = {}
+
+                    now = time.time()
+                    elapsed = max(now - bucket.get("timestamp", now), 0)
+                    tokens = min(self._rate_burst, bucket.get("tokens", self._rate_burst) + elapsed * rate)
+
+                    if tokens >= 1:
+                        tokens -= 1
+                        wait = 0
+                    else:
+                        wait = (1 - tokens) / rate
+
+                    bucket_file.seek(0)
+                    bucket_file.truncate()
+                    json.dump({"tokens": tokens, "timestamp": now}, bucket_file)
+                    bucket_file.flush()
+                finally:
+                    fcntl.flock(bucket_file, fcntl.LOCK_UN)
+
+            if not wait:
+                return waited
+
+            time.sleep(wait)
+            waited += wait
+
+    def _get_retry_delay(self, r, retries):
+        """This function is used to compute how long to wait before retrying a request.
+        The server hints (Retry-After and Akamai's X-RateLimit-Next) are honored, otherwise it is an exponential backoff with full jitter.
+        :param r: response object, None when the request failed without a response
+        :param retries: Number of retries already made
+        :return: delay in seconds
+        """
+        if r is not None:
+            retry_after = r.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(max(float(retry_after), 0), RETRY_MAX_DELAY)
+                except ValueError:
+                    try:
+                        import email.utils
+
+                        retry_at = email.utils.parsedate_to_datetime(retry_after).timestamp()
+                        return min(max(retry_at - time.time(), 0), RETRY_MAX_DELAY)
+                    except (TypeError, ValueError):
+                        pass
+
+            rate_limit_next = r.headers.get("X-RateLimit-Next")
+            if rate_limit_next:
+                try:
+                    retry_at = datetime.fromisoformat(rate_limit_next.replace("Z", "+00:00")).timestamp()
+                    return min(max(retry_at - time.time(), 0), RETRY_MAX_DELAY)
+                except ValueError:
+                    pass
+
+        return random.uniform(0, min(RETRY_BACKOFF_BASE * 2**retries, RETRY_MAX_DELAY))  # nosemgrep
+
+    def _run_concurrently(self, function, items):
+        """This function is used to call a function on every item on a thread pool, at most max_concurrency calls at a time.
+        :param function: Function called with each item
+        :param items: List of items
+        :return: list of the function results, in the input order
+        """
+        if not items:
+            return []
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        # executor.map keeps the results in the input order
+        with ThreadPoolExecutor(max_workers=min(self._max_concurrency, len(items))) as executor:
+            return list(executor.map(function, items))
 
     def _handle_test_connectivity(self, param):
         """This function is used test connectivity to Akamai
@@ -251,16 +866,48 @@ class AkamaiNetworkListsConnector(BaseConnector):
         if param.get("search"):
             params["search"] = param.get("search")
 
-        endpoint = self._process_parameters(AKAMAI_NETWORK_LIST_ENDPOINT, params)
-
-        # make rest call
-        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+        ret_val, offset = self._validate_integer(action_result, param.get("offset", 0), OFFSET_KEY)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
+        ret_val, limit = self._validate_integer(action_result, param.get("limit"), LIMIT_KEY)
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
+        endpoint = self._process_parameters(AKAMAI_NETWORK_LIST_ENDPOINT, params)
+        cache_key = self._get_cache_key(AKAMAI_NETWORK_LIST_ENDPOINT, dict(params, limit=limit, offset=offset))
+
+        response = self._cache_get(cache_key)
+        if response is None:
+            # make rest call, the lists are parsed one at a time from the response stream
+            ret_val, r = self._make_stream_call(endpoint, action_result, params=None, headers=None)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            try:
+                fields = {}
+                network_lists = self._iter_json_array(r, "networkLists", fields)
+                page = list(itertools.islice(network_lists, offset, offset + limit if limit else None))
+                # The fields after the array, like the links, are only read once the remaining lists were parsed
+                for _ in network_lists:
+                    pass
+                response = dict(fields, networkLists=page)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return action_result.set_status(phantom.APP_ERROR, f"Error occurred while processing the response. {error_message}")
+            finally:
+                r.close()
+
+            self._cache_put(cache_key, response)
+
         action_result.add_data(response)
 
+        summary = action_result.update_summary({})
+        summary["num_networks"] = len(response.get("networkLists", []))
+        summary["cache_hits"] = self._cache_hits
+        summary["cache_misses"] = self._cache_misses
+
         return action_result.set_status(phantom.APP_SUCCESS)
 
     def _handle_get_network(self, param):
@@ -279,21 +926,123 @@ class AkamaiNetworkListsConnector(BaseConnector):
             if not param_networklistid:
                 return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'networklistid' action parameter")
 
-        # Loop through each Network ID to retrive the data.
-        for networklist in param_networklistid:
-            # Format the URI
-            endpoint = self._process_parameters(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklist}", params)
+        # Serve what we can from the cache, the cache is only touched from this thread
+        results = [None] * len(param_networklistid)
+        cache_keys = [self._get_cache_key(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklist}", params) for networklist in param_networklistid]
+        pending = []
+        for index, cache_key in enumerate(cache_keys):
+            response = self._cache_get(cache_key)
+            if response is None:
+                pending.append(index)
+            else:
+                results[index] = RetVal(phantom.APP_SUCCESS, response)
+
+        # In incremental mode the stored copies are revalidated with their syncPoint instead of being downloaded again
+        incremental = bool(param.get("incremental") and params.get("includeElements"))
+        stored_copies = {}
+        if incremental:
+            for index in pending:
+                entry = self._cache_peek(cache_keys[index])
+                if entry is not None and entry.get("syncPoint") is not None:
+                    stored_copies[index] = entry
+
+        unchanged_networks = 0
+        if pending:
+            # Fetch the remaining Network IDs concurrently, the results are in the input order
+            fetched = self._run_concurrently(
+                lambda index: self._fetch_network(param_networklistid[index], params, stored_copies.get(index, {}).get("syncPoint")), pending
+            )
 
-            # make rest call
-            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+            for index, (ret_val, response) in zip(pending, fetched):
+                if phantom.is_success(ret_val) and response is None:
+                    unchanged_networks += 1
+                    response = stored_copies[index]["data"]
+
+                results[index] = RetVal(ret_val, response)
+                if phantom.is_success(ret_val):
+                    self._cache_put(cache_keys[index], response, param_networklistid[index], force=incremental)
 
+        failed_networks = []
+        for networklist, (ret_val, response) in zip(param_networklistid, results):
             if phantom.is_fail(ret_val):
-                return action_result.get_status()
+                failed_networks.append(f"{networklist}: {response}")
+                action_result.add_data({"uniqueId": networklist, "error": response})
+                continue
 
             action_result.add_data(response)
 
+        summary = action_result.update_summary({})
+        summary["total_networks"] = len(param_networklistid)
+        summary["failed_networks"] = len(failed_networks)
+        summary["cache_hits"] = self._cache_hits
+        summary["cache_misses"] = self._cache_misses
+        if incremental:
+            summary["unchanged_networks"] = unchanged_networks
+
+        if len(failed_networks) == len(param_networklistid):
+            return action_result.set_status(phantom.APP_ERROR, "Unable to fetch the network list(s). {}".format(" ".join(failed_networks)))
+
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _fetch_network(self, networklist, params, sync_point=None):
+        """This function is used to fetch a single network list, concurrently with the other lists of the action.
+        :param networklist: Unique identifier of the network list
+        :param params: Dictionary of query parameters
+        :param sync_point: syncPoint of a stored copy of the list, the elements are only downloaded when the list changed since
+        :return: status success/failure, network list response (None when the stored copy is still current) or error message
+        """
+        # Each fetch gets its own action result so a failure does not change the status of the other fetches
+        fetch_result = ActionResult()
+
+        if sync_point is not None:
+            # Cheap read without the elements to find out whether the list changed
+            endpoint = self._process_parameters(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklist}", dict(params, includeElements=False))
+
+            # make rest call
+            ret_val, response = self._make_rest_call(endpoint, fetch_result, params=None, headers=None)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(phantom.APP_ERROR, fetch_result.get_message())
+
+            if response.get("syncPoint") == sync_point:
+                return RetVal(phantom.APP_SUCCESS, None)
+
+        endpoint = self._process_parameters(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklist}", params)
+
+        # make rest call
+        ret_val, response = self._make_rest_call(endpoint, fetch_result, params=None, headers=None)
+
+        if phantom.is_fail(ret_val):
+            return RetVal(phantom.APP_ERROR, fetch_result.get_message())
+
+        return RetVal(phantom.APP_SUCCESS, response)
+
+    def _get_network_list(self, action_result, networklistid, include_elements):
+        """This function is used to read a network list, served from the cache when a fresh copy is there.
+        :param action_result: object of ActionResult class
+        :param networklistid: Unique identifier of the network list
+        :param include_elements: Whether the elements of the list are needed
+        :return: status success/failure, network list response
+        """
+        params = {"includeElements": include_elements}
+        cache_key = self._get_cache_key(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}", params)
+
+        response = self._cache_get(cache_key)
+        if response is not None:
+            return RetVal(phantom.APP_SUCCESS, response)
+
+        endpoint = self._process_parameters(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}", params)
+
+        # make rest call
+        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+
+        if phantom.is_fail(ret_val):
+            return RetVal(action_result.get_status(), None)
+
+        self._cache_put(cache_key, response, networklistid)
+
+        return RetVal(phantom.APP_SUCCESS, response)
+
     def _handle_add_element(self, param):
         # Use  POST /network-list/v2/network-lists/{networkListId}/append since you can add more than one element to a list.
         # Should be easier than using the 'Add an element' function which you can only add one at a time.
@@ -302,26 +1051,96 @@ class AkamaiNetworkListsConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        param_elements = [x.strip() for x in param.get("elements").split(",")]
+        param_elements = [x.strip() for x in (param.get("elements") or "").split(",")]
         param_elements = list([_f for _f in param_elements if _f])
-        if not param_elements:
-            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'elements' action parameter")
+        vault_id = param.get("vault_id")
+        if not param_elements and not vault_id:
+            return action_result.set_status(
+                phantom.APP_ERROR, "Please provide valid input value in the 'elements' or 'vault_id' action parameter"
+            )
+
+        ret_val, chunk_size = self._validate_integer(action_result, param.get("chunk_size"), CHUNK_SIZE_KEY)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        # The elements are checked against the list type. The list is read once, with its elements when they are compared with or merged into
+        include_elements = bool(param.get("idempotent") or param.get("aggregate_existing"))
+        ret_val, network_list = self._get_network_list(action_result, param.get("networklistid"), include_elements)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        if vault_id:
+            ret_val, elements = self._get_vault_elements(
+                action_result, vault_id, param_elements, network_list.get("type"), param.get("invalid_elements", "fail")
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            try:
+                if not (param.get("idempotent") or param.get("aggregate_existing") or param.get("aggregate")):
+                    # Stream the file, only one chunk of elements is held at a time. The vault ID is the hash of the file content
+                    fingerprint = self._get_elements_fingerprint([vault_id, *param_elements], chunk_size or DEFAULT_VAULT_CHUNK_SIZE)
+                    return self._append_elements_in_chunks(
+                        action_result,
+                        param.get("networklistid"),
+                        elements,
+                        chunk_size or DEFAULT_VAULT_CHUNK_SIZE,
+                        param.get("resume", False),
+                        fingerprint,
+                    )
+
+                # Comparing with or aggregating the list needs all the elements at once
+                param_elements = list(elements)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}")
+        else:
+            ret_val, param_elements = self._validate_elements(
+                action_result, param_elements, network_list.get("type"), param.get("invalid_elements", "fail")
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+        if param.get("idempotent"):
+            # Only send the elements that are not on the list yet, without any write when all of them are
+            present = {self._normalize_element(element) for element in network_list.get("list") or []}
+            pending = {}
+            for element in param_elements:
+                pending.setdefault(self._normalize_element(element), element)
+            param_elements = [element for key, element in pending.items() if key not in present]
+
+            summary = action_result.update_summary({})
+            summary["changed"] = bool(param_elements)
+            summary["num_present"] = len(pending) - len(param_elements)
+
+            if not param_elements:
+                action_result.add_data(network_list)
+                return action_result.set_status(phantom.APP_SUCCESS, "All the elements are already present in the network list")
+
+        if param.get("aggregate_existing"):
+            return self._aggregate_network_list(action_result, param.get("networklistid"), param_elements, network_list)
+
+        if param.get("aggregate"):
+            param_elements, eliminated = self._aggregate_elements(param_elements)
+            summary = action_result.update_summary({})
+            summary["num_eliminated"] = eliminated
+
+        if chunk_size and len(param_elements) > chunk_size:
+            return self._append_elements_in_chunks(
+                action_result, param.get("networklistid"), param_elements, chunk_size, param.get("resume", False)
+            )
 
         if len(param_elements) <= 1:
             # Create the param data to build the URI correctly. Only doing this to reuse code.
             # Can assign manually but it wont be as flexible if the API changes.
-            params = {"element": param.get("elements")}
+            params = {"element": param_elements[0]}
 
             endpoint = self._process_parameters("{}/{}/elements".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid")), params)
 
             # make rest call
             ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="put")
         else:
-            data = {"list": []}
-            # Rebuild the elements as JSON
-            for element in param_elements:
-                # Add element to the list
-                data["list"].append(element)
+            data = {"list": param_elements}
 
             endpoint = "{}/{}/append".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid"))
 
@@ -335,118 +1154,426 @@ class AkamaiNetworkListsConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_remove_element(self, param):
-        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+    def _append_elements_in_chunks(self, action_result, networklistid, elements, chunk_size, resume, fingerprint=None):
+        """This function is used to append elements to a network list in slices of chunk_size elements.
+        The last committed chunk is recorded in the state after every chunk, so a failed run can be resumed.
+        :param action_result: object of ActionResult class
+        :param networklistid: Unique identifier of the network list
+        :param elements: Elements to add to the network list, a list or an iterator that is consumed one chunk at a time
+        :param chunk_size: Number of elements sent per request
+        :param resume: Skip the chunks committed by a previous run with the same elements
+        :param fingerprint: Identifies the elements of an iterator, a list is fingerprinted from its elements
+        :return: status success/failure
+        """
+        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}/append"
+        total_chunks = None
+        if fingerprint is None:
+            total_chunks = (len(elements) + chunk_size - 1) // chunk_size
+            fingerprint = self._get_elements_fingerprint(elements, chunk_size)
+        of_total = f" of {total_chunks}" if total_chunks is not None else ""
 
-        action_result = self.add_action_result(ActionResult(dict(param)))
+        append_progress = self._state.setdefault(APPEND_PROGRESS_STATE_KEY, {})
+        progress = append_progress.get(networklistid)
 
-        param_elements = [x.strip() for x in param.get("elements").split(",")]
-        param_elements = list([_f for _f in param_elements if _f])
-        if not param_elements:
-            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'elements' action parameter")
+        start_chunk = 0
+        if resume and progress and progress.get("fingerprint") == fingerprint:
+            start_chunk = progress.get("last_chunk", -1) + 1
+            self.save_progress(f"Resuming after chunk {start_chunk}{of_total} committed at syncPoint {progress.get('syncPoint')}")
 
-        if len(param_elements) < 2:
-            # Create the param data to build the URI correctly. Only doing this to reuse code.
-            # Can assign manually but it wont be as flexible if the API changes.
-            params = {"element": param.get("elements")}
+        summary = action_result.update_summary({})
+        summary["total_chunks"] = total_chunks
+        summary["chunks_skipped"] = 0
+        summary["chunks_sent"] = 0
 
-            endpoint = self._process_parameters("{}/{}/elements".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid")), params)
+        response = None
+        for index, chunk in enumerate(self._iter_batches(elements, chunk_size)):
+            if index < start_chunk:
+                summary["chunks_skipped"] += 1
+                continue
 
-            # make rest call
-            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="delete")
-        else:
-            # This is a hack to remove multiple elements at a time. I use the "Update a network list" API to be able to remove
-            # multiple IP's / CIDR's.
+            self.save_progress(f"Appending chunk {index + 1}{of_total}")
 
-            # Need to get the list of items before we can remove them. We also need other data to be able to update the network list.
-            # Format the URI
-            endpoint = "{}/{}".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid"))
+            data = {"list": chunk}
 
             # make rest call
-            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
-            try:
-                networkList = response["list"]
-            except Exception as e:
-                error_message = self._get_error_message_from_exception(e)
-                return action_result.set_status(phantom.APP_ERROR, f"Error occurred while processing the response. {error_message}")
-            # Loop through the parameters passed.
-            for item in param_elements:
-                # Index is used to pop the item from the list
-                index = 0
-                # Loop through the current list of addresses
-                for network in networkList:  # nosemgrep
-                    if item == network:
-                        networkList.pop(index)
-                    index += 1
+            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="post", json=data)
 
-            # Create the data we are going to update the list details with.
-            # All fields here are required for the "Update a network list" API
-            data = {
-                "name": response.get("name", ""),
-                "description": response.get("description", ""),
-                "type": response.get("type", ""),
-                "syncPoint": response.get("syncPoint", ""),
-                "list": networkList,
+            if phantom.is_fail(ret_val):
+                return action_result.set_status(
+                    phantom.APP_ERROR,
+                    f"Failed to append chunk {index + 1}{of_total}. Rerun the action with 'resume' enabled to continue from this chunk. "
+                    f"{action_result.get_message()}",
+                )
+
+            append_progress[networklistid] = {
+                "fingerprint": fingerprint,
+                "last_chunk": index,
+                "total_chunks": total_chunks,
+                "syncPoint": response.get("syncPoint"),
             }
+            # Save after every chunk, the progress has to survive a run that dies before finalize
+            self.save_state(self._state)
+            summary["chunks_sent"] += 1
 
-            # make rest call
-            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="put", json=data)
+        append_progress.pop(networklistid, None)
+        summary["total_chunks"] = summary["chunks_skipped"] + summary["chunks_sent"]
 
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+        if response is None:
+            # Every chunk was committed by the previous run, return the current list
+            ret_val, response = self._make_rest_call(f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}", action_result, params=None, headers=None)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
 
         action_result.add_data(response)
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_create_network(self, param):
-        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
-
-        action_result = self.add_action_result(ActionResult(dict(param)))
-
-        # Access action parameters passed in the 'param' dictionary
-        ip_data = []
+    def _get_elements_fingerprint(self, elements, chunk_size):
+        """This function is used to identify a chunked append, a resumed run has to send the same elements in the same chunks.
+        :param elements: Elements to add to the network list
+        :param chunk_size: Number of elements sent per request
+        :return: hex digest
+        """
+        digest = hashlib.sha256(str(chunk_size).encode())
+        for element in elements:
+            digest.update(b"\n")
+            digest.update(element.encode())
+
+        return digest.hexdigest()
+
+    def _aggregate_network_list(self, action_result, networklistid, elements, network_list=None):
+        """This function is used to merge elements into a network list and aggregate the merged list.
+        The existing entries may be absorbed by the new ranges, so the whole list is replaced instead of appended to.
+        :param action_result: object of ActionResult class
+        :param networklistid: Unique identifier of the network list
+        :param elements: Elements to add to the network list
+        :param network_list: Network list response with its elements when it was read already, a stale copy is rebased on update
+        :return: status success/failure
+        """
+        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}"
 
-        ip_list = [x.strip() for x in param.get("list").split(",")]
-        ip_list = list([_f for _f in ip_list if _f])
-        if not ip_list:
-            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'list' action parameter")
+        response = network_list
+        if response is None:
+            # make rest call
+            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
 
-        for ip in ip_list:
-            ip_data.append(ip)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
 
-        type = param.get("type")
-        if type not in TYPE_VALUE_LIST:
-            return action_result.set_status(phantom.APP_ERROR, f"Please provide valid input from {TYPE_VALUE_LIST} in 'type' action parameter")
+        summary = action_result.update_summary({})
 
-        data = {"name": param.get("name"), "type": type, "description": param.get("description"), "list": ip_data}
+        def merge_elements(network_list):
+            merged_elements, summary["num_eliminated"] = self._aggregate_elements(network_list["list"] + elements)
+            return merged_elements
 
-        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}"
+        try:
+            merged_elements = merge_elements(response)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Error occurred while processing the response. {error_message}")
 
-        # make rest call
-        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="post", json=data)
+        ret_val, response = self._update_network_list(endpoint, action_result, response, merged_elements, merge_elements)
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
         action_result.add_data(response)
+
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _handle_update_network(self, param):
-        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+    def _update_network_list(self, endpoint, action_result, network_list, elements, rebase=None):
+        """This function is used to replace the elements of a network list using the "Update a network list" API.
+        When another update moved the syncPoint of the list on since it was read, the list is read again and passed to rebase
+        to apply the intended change to its new elements, at most max_rebases times.
+        :param endpoint: Endpoint of the network list
+        :param action_result: object of ActionResult class
+        :param network_list: Current network list response, it provides the other fields the API requires
+        :param elements: New elements of the network list
+        :param rebase: Function that returns the new elements of a network list response, None when there is nothing left to change
+        :return: status success/failure, updated network list response
+        """
+        rebases = 0
+        while True:
+            # Create the data we are going to update the list details with.
+            # All fields here are required for the "Update a network list" API
+            data = {
+                "name": network_list.get("name", ""),
+                "description": network_list.get("description", ""),
+                "type": network_list.get("type", ""),
+                "syncPoint": network_list.get("syncPoint", ""),
+                "list": elements,
+            }
 
-        action_result = self.add_action_result(ActionResult(dict(param)))
+            # make rest call
+            ret_val, r = self._send_request(endpoint, action_result, method="put", params=None, headers=None, json=data)
 
-        # Access action parameters passed in the 'param' dictionary
-        endpoint = "{}/{}/details".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid"))
+            if phantom.is_fail(ret_val):
+                return RetVal(ret_val, None)
 
-        data = {"name": param.get("name"), "description": param.get("description")}
+            if rebase is None or r.status_code not in SYNCPOINT_CONFLICT_STATUS_CODES or rebases >= self._max_rebases:
+                break
 
-        # make rest call
-        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="put", json=data)
+            rebases += 1
+            action_result.add_debug_data({"rebase": rebases, "r_status_code": r.status_code, "syncPoint": data["syncPoint"]})
+            self.save_progress(f"The network list changed since syncPoint {data['syncPoint']}, applying the changes again ({rebases})")
 
-        if phantom.is_fail(ret_val):
-            return action_result.get_status()
+            # make rest call
+            ret_val, network_list = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            elements = rebase(network_list)
+            if elements is None:
+                # The other update already made the change
+                r = None
+                break
+
+        if rebase is not None:
+            summary = action_result.update_summary({})
+            summary["rebases"] = rebases
+
+        if r is None:
+            return RetVal(phantom.APP_SUCCESS, network_list)
+
+        ret_val, response = self._process_response(r, action_result)
+
+        if rebase is not None and r.status_code in SYNCPOINT_CONFLICT_STATUS_CODES:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR, f"The network list kept changing, gave up after {rebases} rebase(s). {action_result.get_message()}"
+                ),
+                response,
+            )
+
+        return RetVal(ret_val, response)
+
+    def _handle_remove_element(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        param_elements = [x.strip() for x in (param.get("elements") or "").split(",")]
+        param_elements = list([_f for _f in param_elements if _f])
+        vault_id = param.get("vault_id")
+        if not param_elements and not vault_id:
+            return action_result.set_status(
+                phantom.APP_ERROR, "Please provide valid input value in the 'elements' or 'vault_id' action parameter"
+            )
+
+        if len(param_elements) < 2 and not vault_id:
+            # Create the param data to build the URI correctly. Only doing this to reuse code.
+            # Can assign manually but it wont be as flexible if the API changes.
+            params = {"element": param.get("elements")}
+
+            endpoint = self._process_parameters("{}/{}/elements".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid")), params)
+
+            # make rest call
+            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="delete")
+        else:
+            # This is a hack to remove multiple elements at a time. I use the "Update a network list" API to be able to remove
+            # multiple IP's / CIDR's.
+
+            # Need to get the list of items before we can remove them. We also need other data to be able to update the network list.
+            # Format the URI
+            endpoint = "{}/{}".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid"))
+
+            # make rest call
+            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            elements = param_elements
+            if vault_id:
+                ret_val, elements = self._get_vault_elements(
+                    action_result, vault_id, param_elements, response.get("type"), param.get("invalid_elements", "fail")
+                )
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+
+            try:
+                # The elements are kept, a conflicting update makes them be applied to the new elements of the list
+                elements = list(elements)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}")
+
+            summary = action_result.update_summary({})
+            delta = {}
+
+            def remove_elements(network_list):
+                remaining_elements, delta["removed_elements"], delta["not_present_elements"] = self._diff_elements(
+                    network_list.get("list") or [], elements
+                )
+                summary["num_removed"] = len(delta["removed_elements"])
+                summary["num_not_present"] = len(delta["not_present_elements"])
+
+                if not delta["removed_elements"]:
+                    return None
+
+                if param.get("aggregate"):
+                    remaining_elements, summary["num_eliminated"] = self._aggregate_elements(remaining_elements)
+
+                return remaining_elements
+
+            remaining_elements = remove_elements(response)
+
+            if remaining_elements is None:
+                # Nothing to remove, skip the update so the syncPoint is not bumped
+                response["removed_elements"] = delta["removed_elements"]
+                response["not_present_elements"] = delta["not_present_elements"]
+                action_result.add_data(response)
+                return action_result.set_status(phantom.APP_SUCCESS, "None of the elements are present in the network list")
+
+            ret_val, response = self._update_network_list(endpoint, action_result, response, remaining_elements, remove_elements)
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            response["removed_elements"] = delta["removed_elements"]
+            response["not_present_elements"] = delta["not_present_elements"]
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        action_result.add_data(response)
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_create_network(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Access action parameters passed in the 'param' dictionary
+        ip_data = [x.strip() for x in (param.get("list") or "").split(",")]
+        ip_data = list([_f for _f in ip_data if _f])
+        vault_id = param.get("vault_id")
+        if not ip_data and not vault_id:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'list' or 'vault_id' action parameter")
+
+        type = param.get("type")
+        if type not in TYPE_VALUE_LIST:
+            return action_result.set_status(phantom.APP_ERROR, f"Please provide valid input from {TYPE_VALUE_LIST} in 'type' action parameter")
+
+        if vault_id:
+            ret_val, elements = self._get_vault_elements(action_result, vault_id, ip_data, type, param.get("invalid_elements", "fail"))
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            if not param.get("aggregate"):
+                return self._create_network_in_chunks(action_result, param, elements)
+
+            try:
+                ip_data = list(elements)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}")
+        else:
+            ret_val, ip_data = self._validate_elements(action_result, ip_data, type, param.get("invalid_elements", "fail"))
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+        if param.get("aggregate"):
+            ip_data, eliminated = self._aggregate_elements(ip_data)
+            summary = action_result.update_summary({})
+            summary["num_eliminated"] = eliminated
+
+        data = {"name": param.get("name"), "type": type, "description": param.get("description"), "list": ip_data}
+
+        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}"
+
+        # make rest call
+        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="post", json=data)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        action_result.add_data(response)
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _create_network_in_chunks(self, action_result, param, elements):
+        """This function is used to create a network list from a stream of elements, holding one chunk of them at a time.
+        The list is created with the first chunk and the other chunks are appended to it.
+        :param action_result: object of ActionResult class
+        :param param: Dictionary of input parameters
+        :param elements: Iterator of elements
+        :return: status success/failure
+        """
+        summary = action_result.update_summary({})
+        summary["chunks_sent"] = 0
+
+        try:
+            chunks = self._iter_batches(elements, DEFAULT_VAULT_CHUNK_SIZE)
+
+            # The pipeline holds at least one element, so the list is created with a chunk of them
+            data = {"name": param.get("name"), "type": param.get("type"), "description": param.get("description"), "list": next(chunks)}
+
+            # make rest call
+            ret_val, response = self._make_rest_call(
+                AKAMAI_NETWORK_LIST_ENDPOINT, action_result, params=None, headers=None, method="post", json=data
+            )
+
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            summary["chunks_sent"] += 1
+            networklistid = response.get("uniqueId")
+            for chunk in chunks:
+                self.save_progress(f"Appending chunk {summary['chunks_sent'] + 1}")
+
+                endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}/append"
+
+                # make rest call
+                ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="post", json={"list": chunk})
+
+                if phantom.is_fail(ret_val):
+                    return action_result.set_status(
+                        phantom.APP_ERROR,
+                        f"The network list {networklistid} was created but appending chunk {summary['chunks_sent'] + 1} failed. "
+                        f"Use 'add element' with the same vault file and 'resume' disabled to add the remaining elements. {action_result.get_message()}",
+                    )
+
+                summary["chunks_sent"] += 1
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}")
+
+        action_result.add_data(response)
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _handle_update_network(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        # Access action parameters passed in the 'param' dictionary
+        endpoint = "{}/{}/details".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid"))
+
+        data = {"name": param.get("name"), "description": param.get("description")}
+
+        if param.get("idempotent"):
+            # Skip the update when the details already match, so the syncPoint is not bumped
+            ret_val, network_list = self._get_network_list(action_result, param.get("networklistid"), False)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            changed = any((network_list.get(key) or "") != (value or "") for key, value in data.items())
+
+            summary = action_result.update_summary({})
+            summary["changed"] = changed
+
+            if not changed:
+                action_result.add_data(network_list)
+                return action_result.set_status(phantom.APP_SUCCESS, "The name and description of the network list are unchanged")
+
+        # make rest call
+        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="put", json=data)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
         action_result.add_data(response)
 
@@ -471,6 +1598,278 @@ class AkamaiNetworkListsConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _handle_sync_network(self, param):
+        """This function is used to make a network list hold exactly the given elements, in as few writes as possible.
+        :param param: Dictionary of input parameters
+        :return: status success/failure
+        """
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        networklistid = param.get("networklistid")
+
+        environments = []
+        if param.get("activate"):
+            environment = param.get("environment", "STAGING")
+            if environment not in ACTIVATE_ENVIRONMENT_VALUE_LIST:
+                return action_result.set_status(
+                    phantom.APP_ERROR, f"Please provide valid input from {ACTIVATE_ENVIRONMENT_VALUE_LIST} in 'environment' action parameter"
+                )
+            environments = ENVIRONMENT_VALUE_LIST if environment == "BOTH" else [environment]
+
+        param_elements = [x.strip() for x in (param.get("elements") or "").split(",")]
+        param_elements = list([_f for _f in param_elements if _f])
+        vault_id = param.get("vault_id")
+        if not param_elements and not vault_id and not param.get("allow_empty"):
+            return action_result.set_status(
+                phantom.APP_ERROR,
+                "Please provide the elements in the 'elements' or 'vault_id' action parameter, or enable 'allow_empty' to empty the list",
+            )
+
+        # The current list is always read from the API, the update is checked against its syncPoint
+        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}"
+
+        # make rest call
+        ret_val, network_list = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        if vault_id:
+            # An empty file empties the list with 'allow_empty', checked below with the inline elements
+            ret_val, elements = self._get_vault_elements(
+                action_result, vault_id, param_elements, network_list.get("type"), param.get("invalid_elements", "fail"), allow_empty=True
+            )
+        else:
+            ret_val, elements = self._validate_elements(
+                action_result, param_elements, network_list.get("type"), param.get("invalid_elements", "fail")
+            )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        desired = {}
+        try:
+            for element in elements:
+                desired.setdefault(self._normalize_element(element), element)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}")
+
+        if not desired and not param.get("allow_empty"):
+            return action_result.set_status(phantom.APP_ERROR, "No valid elements were given, enable 'allow_empty' to empty the list")
+
+        summary = action_result.update_summary({})
+        delta = {}
+
+        def sync_elements(network_list):
+            current = {}
+            for element in network_list.get("list") or []:
+                current.setdefault(self._normalize_element(element), element)
+
+            delta["added_elements"] = [element for key, element in desired.items() if key not in current]
+            delta["removed_elements"] = [element for key, element in current.items() if key not in desired]
+            summary["changed"] = bool(delta["added_elements"] or delta["removed_elements"])
+            summary["num_added"] = len(delta["added_elements"])
+            summary["num_removed"] = len(delta["removed_elements"])
+
+            if not summary["changed"]:
+                return None
+
+            # The kept elements stay in the form they are stored in
+            return [element for key, element in current.items() if key in desired] + delta["added_elements"]
+
+        elements = sync_elements(network_list)
+
+        if delta["removed_elements"]:
+            # Removals need the whole list
+            ret_val, network_list = self._update_network_list(endpoint, action_result, network_list, elements, sync_elements)
+        elif delta["added_elements"]:
+            # make rest call
+            ret_val, network_list = self._make_rest_call(
+                f"{endpoint}/append", action_result, params=None, headers=None, method="post", json={"list": delta["added_elements"]}
+            )
+
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        network_list["added_elements"] = delta["added_elements"]
+        network_list["removed_elements"] = delta["removed_elements"]
+        action_result.add_data(network_list)
+
+        if not summary["changed"]:
+            return action_result.set_status(phantom.APP_SUCCESS, "The network list already holds exactly the given elements")
+
+        # Only a changed list is activated, an unchanged one holds what was activated by the run that changed it
+        data = {"comments": param.get("comments", "")}
+        failed_activations = []
+        # With BOTH the environments are activated concurrently, like 'activate network' does
+        results = self._run_concurrently(lambda environment: self._activate_network(networklistid, environment, data), environments)
+        for environment, (ret_val, activation_result) in zip(environments, results):
+            summary[f"{environment.lower()}_activation_status"] = (
+                activation_result.get_data()[0].get("activationStatus") if activation_result.get_data_size() else None
+            )
+            if phantom.is_fail(ret_val):
+                failed_activations.append(f"{environment}: {activation_result.get_message()}")
+
+        if failed_activations:
+            return action_result.set_status(
+                phantom.APP_ERROR, "The network list was updated but the activation failed. {}".format(" ".join(failed_activations))
+            )
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _get_vault_file_path(self, action_result, vault_id):
+        """This function is used to find the path of a vault file.
+        :param action_result: object of ActionResult class
+        :param vault_id: Vault ID of the file
+        :return: status success/failure, file path
+        """
+        try:
+            # Only the actions reading a vault file need the playbook API
+            import phantom.rules as phantom_rules
+
+            success, message, vault_info = phantom_rules.vault_info(vault_id=vault_id)
+            vault_info = list(vault_info)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Unable to find the vault file. {error_message}"), None)
+
+        if not success or not vault_info or not vault_info[0].get("path"):
+            return RetVal(
+                action_result.set_status(phantom.APP_ERROR, f"Please provide a valid vault ID in the 'vault_id' action parameter. {message}"),
+                None,
+            )
+
+        return RetVal(phantom.APP_SUCCESS, vault_info[0]["path"])
+
+    def _iter_file_elements(self, file_path):
+        """This function is used to read the elements of a text or CSV file, one or more comma separated elements per line.
+        :param file_path: Path of the file
+        :return: generator of elements
+        """
+        with open(file_path, encoding="utf-8-sig") as f:
+            for line in f:
+                if "," not in line:
+                    # One element per line is the common layout of feeds
+                    line = line.strip()
+                    if line:
+                        yield line
+                    continue
+
+                for element in line.split(","):
+                    element = element.strip()
+                    if element:
+                        yield element
+
+    def _get_vault_elements(self, action_result, vault_id, elements, list_type, invalid_elements, allow_empty=False):
+        """This function is used to build the pipeline that reads the elements of a vault file:
+        the lines are split and stripped, then the elements are validated against the list type and de-duplicated.
+        When invalid elements fail the action, the file is checked in a first pass so nothing is sent before that is known.
+        The first element is read before the pipeline is returned, so a file without valid elements fails the action up front.
+        :param action_result: object of ActionResult class
+        :param vault_id: Vault ID of a text or CSV file
+        :param elements: Elements given inline, they go through the pipeline ahead of the file
+        :param list_type: Network list type from TYPE_VALUE_LIST
+        :param invalid_elements: 'fail' to fail the action on invalid elements, 'drop' to leave them out
+        :param allow_empty: Return an empty pipeline instead of failing when no valid elements are found
+        :return: status success/failure, generator of elements
+        """
+        if invalid_elements not in INVALID_ELEMENTS_VALUE_LIST:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR, f"Please provide valid input from {INVALID_ELEMENTS_VALUE_LIST} in 'invalid_elements' action parameter"
+                ),
+                None,
+            )
+
+        ret_val, file_path = self._get_vault_file_path(action_result, vault_id)
+        if phantom.is_fail(ret_val):
+            return RetVal(action_result.get_status(), None)
+
+        summary = action_result.update_summary({})
+        summary["num_invalid"] = 0
+        summary["num_duplicates"] = 0
+
+        if invalid_elements == "fail":
+            num_invalid = 0
+            invalid = []
+            try:
+                for element in itertools.chain(elements, self._iter_file_elements(file_path)):
+                    if not self._is_valid_element(element, list_type):
+                        num_invalid += 1
+                        if len(invalid) < INVALID_ELEMENTS_MSG_LIMIT:
+                            invalid.append(element)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return RetVal(action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}"), None)
+
+            if num_invalid:
+                summary["num_invalid"] = num_invalid
+                return RetVal(
+                    action_result.set_status(phantom.APP_ERROR, self._get_invalid_elements_message(list_type, num_invalid, invalid)), None
+                )
+
+        pipeline = itertools.chain(elements, self._iter_file_elements(file_path))
+        if invalid_elements == "drop":
+            # The first pass already found every element valid otherwise
+            pipeline = self._iter_valid_elements(pipeline, list_type, summary)
+        pipeline = self._iter_unique_elements(pipeline, summary)
+
+        try:
+            first_element = next(pipeline, None)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Error occurred while reading the vault file. {error_message}"), None)
+
+        if first_element is None:
+            if allow_empty:
+                return RetVal(phantom.APP_SUCCESS, iter(()))
+            return RetVal(action_result.set_status(phantom.APP_ERROR, "No valid elements found in the vault file"), None)
+
+        return RetVal(phantom.APP_SUCCESS, itertools.chain([first_element], pipeline))
+
+    def _iter_valid_elements(self, elements, list_type, summary):
+        """This function is used to leave out the elements that are not valid for the list type.
+        :param elements: Iterable of elements
+        :param list_type: Network list type from TYPE_VALUE_LIST
+        :param summary: Summary dictionary, num_invalid is counted in it
+        :return: generator of elements
+        """
+        for element in elements:
+            if self._is_valid_element(element, list_type):
+                yield element
+            else:
+                summary["num_invalid"] += 1
+
+    def _iter_unique_elements(self, elements, summary):
+        """This function is used to leave out the elements whose canonical form was seen before.
+        :param elements: Iterable of elements
+        :param summary: Summary dictionary, num_duplicates is counted in it
+        :return: generator of elements
+        """
+        seen = set()
+        for element in elements:
+            key = self._normalize_element(element)
+            if key in seen:
+                summary["num_duplicates"] += 1
+                continue
+            seen.add(key)
+            yield element
+
+    def _iter_batches(self, elements, batch_size):
+        """This function is used to group elements in lists of at most batch_size elements.
+        :param elements: Iterable of elements
+        :param batch_size: Number of elements per list
+        :return: generator of lists
+        """
+        iterator = iter(elements)
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
     def _handle_activate_network(self, param):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
 
@@ -494,23 +1893,182 @@ class AkamaiNetworkListsConnector(BaseConnector):
 
             data["notification"] = notificationEmails
 
+        param_networklistid = [x.strip() for x in param.get("networklistid").split(",")]
+        param_networklistid = list([_f for _f in param_networklistid if _f])
+        if not param_networklistid:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'networklistid' action parameter")
+
         environment = param.get("environment")
-        if environment not in ENVIRONMENT_VALUE_LIST:
+        if environment not in ACTIVATE_ENVIRONMENT_VALUE_LIST:
             return action_result.set_status(
-                phantom.APP_ERROR, f"Please provide valid input from {ENVIRONMENT_VALUE_LIST} in 'environment' action parameter"
+                phantom.APP_ERROR, f"Please provide valid input from {ACTIVATE_ENVIRONMENT_VALUE_LIST} in 'environment' action parameter"
             )
 
-        endpoint = "{}/{}/environments/{}/activate".format(AKAMAI_NETWORK_LIST_ENDPOINT, param.get("networklistid"), environment)
+        environments = ENVIRONMENT_VALUE_LIST if environment == "BOTH" else [environment]
+
+        wait_timeout = None
+        if param.get("wait_for_activation"):
+            ret_val, wait_timeout = self._validate_integer(
+                action_result, param.get("wait_timeout", DEFAULT_ACTIVATION_WAIT_TIMEOUT), WAIT_TIMEOUT_KEY, allow_zero=False
+            )
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+        # One activation per (network list, environment), dispatched concurrently, the results are in the input order
+        targets = [(networklist, target_environment) for networklist in param_networklistid for target_environment in environments]
+        results = self._run_concurrently(lambda target: self._activate_network(target[0], target[1], data, wait_timeout), targets)
+
+        failed_activations = []
+        poll_count = 0
+        elapsed_seconds = 0
+        for (networklist, target_environment), (ret_val, activation_result) in zip(targets, results):
+            response = activation_result.get_data()[0] if activation_result.get_data_size() else {}
+            response.setdefault("uniqueId", networklist)
+            response.setdefault("environment", target_environment)
+
+            if phantom.is_fail(ret_val):
+                failed_activations.append(f"{networklist} ({target_environment}): {activation_result.get_message()}")
+                response["error"] = activation_result.get_message()
+
+            action_result.add_data(response)
+
+            activation_summary = activation_result.get_summary()
+            poll_count += activation_summary.get("poll_count", 0)
+            elapsed_seconds = max(elapsed_seconds, activation_summary.get("elapsed_seconds", 0))
+
+        summary = action_result.update_summary({})
+        summary["total_activations"] = len(targets)
+        summary["failed_activations"] = len(failed_activations)
+        if wait_timeout:
+            summary["poll_count"] = poll_count
+            summary["elapsed_seconds"] = elapsed_seconds
+            if len(targets) == 1:
+                summary["activation_status"] = results[0][1].get_summary().get("activation_status")
+
+        if len(targets) == 1:
+            # A single activation keeps the message of the activation itself
+            ret_val, activation_result = results[0]
+            return action_result.set_status(ret_val, activation_result.get_message())
+
+        if len(failed_activations) == len(targets):
+            return action_result.set_status(phantom.APP_ERROR, "Unable to activate the network list(s). {}".format(" ".join(failed_activations)))
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _activate_network(self, networklistid, environment, data, wait_timeout=None):
+        """This function is used to activate a network list in one environment, concurrently with the other activations of the action.
+        :param networklistid: Unique identifier of the network list
+        :param environment: STAGING or PRODUCTION
+        :param data: Dictionary of the activation request body
+        :param wait_timeout: Number of seconds to wait for the activation to finish, None to return right after the request
+        :return: status success/failure, action result holding the activation response, message and polling summary
+        """
+        # Each activation gets its own action result so a failure does not change the status of the other activations
+        activation_result = ActionResult()
+
+        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}/environments/{environment}/activate"
 
         # make rest call
-        ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None, method="post", json=data)
+        ret_val, response = self._make_rest_call(endpoint, activation_result, params=None, headers=None, method="post", json=data)
+
+        if phantom.is_fail(ret_val):
+            return RetVal(activation_result.get_status(), activation_result)
+
+        activation_result.add_data(response)
+
+        if wait_timeout:
+            ret_val, status_response = self._wait_for_activation(
+                activation_result, networklistid, environment, wait_timeout, response.get("syncPoint")
+            )
+            if status_response:
+                response["activationStatus"] = status_response.get("activationStatus")
+
+            return RetVal(ret_val, activation_result)
+
+        return RetVal(activation_result.set_status(phantom.APP_SUCCESS), activation_result)
+
+    def _handle_wait_activation(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        environment = param.get("environment")
+        if environment not in ENVIRONMENT_VALUE_LIST:
+            return action_result.set_status(
+                phantom.APP_ERROR, f"Please provide valid input from {ENVIRONMENT_VALUE_LIST} in 'environment' action parameter"
+            )
 
+        ret_val, wait_timeout = self._validate_integer(
+            action_result, param.get("timeout", DEFAULT_ACTIVATION_WAIT_TIMEOUT), TIMEOUT_KEY, allow_zero=False
+        )
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        action_result.add_data(response)
+        ret_val, response = self._wait_for_activation(action_result, param.get("networklistid"), environment, wait_timeout)
 
-        return action_result.set_status(phantom.APP_SUCCESS)
+        if response:
+            action_result.add_data(response)
+
+        return action_result.get_status()
+
+    def _wait_for_activation(self, action_result, networklistid, environment, wait_timeout, sync_point=None):
+        """This function is used to poll the activation status of a network list until it is no longer pending.
+        The interval between polls grows from ACTIVATION_POLL_INITIAL_INTERVAL up to ACTIVATION_POLL_MAX_INTERVAL.
+        The number of polls and the elapsed time are added to the summary of the action result.
+        :param action_result: object of ActionResult class
+        :param networklistid: Unique identifier of the network list
+        :param environment: STAGING or PRODUCTION
+        :param wait_timeout: Number of seconds to wait at most
+        :param sync_point: syncPoint that was activated, a status of an older version is considered pending
+        :return: status success/failure, last status response
+        """
+        endpoint = f"{AKAMAI_NETWORK_LIST_ENDPOINT}/{networklistid}/environments/{environment}/status"
+
+        summary = action_result.update_summary({})
+        start_time = time.monotonic()
+        deadline = start_time + wait_timeout
+        interval = ACTIVATION_POLL_INITIAL_INTERVAL
+        poll_count = 0
+        response = None
+
+        while True:
+            # make rest call
+            ret_val, response = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+            poll_count += 1
+            summary["poll_count"] = poll_count
+            summary["elapsed_seconds"] = round(time.monotonic() - start_time, 1)
+
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            activation_status = response.get("activationStatus")
+            summary["activation_status"] = activation_status
+
+            pending = activation_status in ACTIVATION_PENDING_STATUSES
+            if sync_point is not None and (response.get("syncPoint") or 0) < sync_point:
+                pending = True
+
+            if not pending:
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return RetVal(
+                    action_result.set_status(
+                        phantom.APP_ERROR,
+                        f"Timed out after {wait_timeout} seconds waiting for the activation, the last status was {activation_status}",
+                    ),
+                    response,
+                )
+
+            self.save_progress(f"Activation status is {activation_status}, polling again in {min(interval, remaining):.0f} seconds")
+            time.sleep(min(interval, remaining))
+            interval = min(interval * ACTIVATION_POLL_BACKOFF, ACTIVATION_POLL_MAX_INTERVAL)
+
+        if activation_status in ACTIVATION_FAILED_STATUSES:
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Activation finished with status {activation_status}"), response)
+
+        return RetVal(action_result.set_status(phantom.APP_SUCCESS, f"Activation finished with status {activation_status}"), response)
 
     def _handle_activation_status(self, param):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
@@ -586,27 +2144,271 @@ class AkamaiNetworkListsConnector(BaseConnector):
 
         action_result = self.add_action_result(ActionResult(dict(param)))
 
-        # make rest call
+        ret_val, offset = self._validate_integer(action_result, param.get("offset", 0), OFFSET_KEY)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, limit = self._validate_integer(action_result, param.get("limit"), LIMIT_KEY)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        map_ids = None
+        if param.get("map_id"):
+            map_ids = [x.strip() for x in str(param.get("map_id")).split(",")]
+            map_ids = set([_f for _f in map_ids if _f])
+            if not map_ids:
+                return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'map_id' action parameter")
+
+        compact = param.get("compact", False)
+        diff = param.get("diff", False)
+
+        # make rest call, the maps are parsed one at a time from the response stream
         endpoint = "../../siteshield/v1/maps"
-        ret_val, site_shields_data = self._make_rest_call(endpoint, action_result, params=None, headers=None)
+        ret_val, r = self._make_stream_call(endpoint, action_result, params=None, headers=None)
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        # Get ips from response. The full policy structure is required (policySettings[0] must be created)
-        for site_shield in site_shields_data["siteShieldMaps"]:
-            for ip_range in site_shield["currentCidrs"]:
-                action_result.add_data({"cidr": ip_range})
+        try:
+            site_shields = self._iter_json_array(r, "siteShieldMaps")
+            if map_ids:
+                site_shields = (site_shield for site_shield in site_shields if str(site_shield.get("id")) in map_ids)
+
+            if diff:
+                snapshots = self._state.setdefault(SITESHIELD_SNAPSHOT_STATE_KEY, {})
+                changes = self._iter_site_shield_changes(site_shields, snapshots)
+                # The snapshot of a changed map only moves forward once its row is returned, so paged runs do not lose changes
+                for row, snapshot in itertools.islice(changes, offset, offset + limit if limit else None):
+                    action_result.add_data(row)
+                    snapshots[str(row["mapId"])] = snapshot
+            else:
+                # Get ips from response. The full policy structure is required (policySettings[0] must be created)
+                if compact:
+                    rows = (
+                        {"mapId": site_shield.get("id"), "ruleName": site_shield.get("ruleName"), "cidrs": site_shield.get("currentCidrs", [])}
+                        for site_shield in site_shields
+                    )
+                else:
+                    rows = ({"cidr": ip_range} for site_shield in site_shields for ip_range in site_shield["currentCidrs"])
+
+                for row in itertools.islice(rows, offset, offset + limit if limit else None):
+                    action_result.add_data(row)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, f"Error occurred while processing the response. {error_message}")
+        finally:
+            r.close()
 
         self.save_progress(f"Action handler for: {self.get_action_identifier()} ended")
 
         # Add a dictionary that is made up of the most important values from data into the summary
         summary = action_result.update_summary({})
         summary["num_data"] = action_result.get_data_size()
+        if diff:
+            summary["num_added_cidrs"] = sum(len(row["addedCidrs"]) for row in action_result.get_data())
+            summary["num_removed_cidrs"] = sum(len(row["removedCidrs"]) for row in action_result.get_data())
 
         # Return success, no need to set the message, only the status
         # BaseConnector will create a textual message based off of the summary dictionary
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _iter_site_shield_changes(self, site_shields, snapshots):
+        """This function is used to compare site shield maps against the snapshots of the previous run.
+        The snapshot of a map holds the hash of its sorted current CIDRs, the CIDRs are only compared when the hash differs.
+        :param site_shields: Iterable of site shield maps
+        :param snapshots: Dictionary of snapshots by map ID, unchanged maps are recorded in place
+        :return: generator of (row, snapshot) for the maps that changed or have a pending proposal
+        """
+        for site_shield in site_shields:
+            map_id = str(site_shield.get("id"))
+            current_cidrs = sorted(set(site_shield.get("currentCidrs") or []))
+            proposed_cidrs = set(site_shield.get("proposedCidrs") or [])
+            snapshot = {"hash": hashlib.sha256("\n".join(current_cidrs).encode()).hexdigest(), "cidrs": current_cidrs}
+
+            previous = snapshots.get(map_id)
+            if previous is not None and previous.get("hash") == snapshot["hash"]:
+                added_cidrs, removed_cidrs = [], []
+            else:
+                previous_cidrs = set(previous.get("cidrs", [])) if previous else set()
+                added_cidrs = [cidr for cidr in current_cidrs if cidr not in previous_cidrs]
+                removed_cidrs = sorted(previous_cidrs.difference(current_cidrs))
+
+            # An empty proposal means there is no pending change to the map
+            proposed_added_cidrs = sorted(proposed_cidrs.difference(current_cidrs)) if proposed_cidrs else []
+            proposed_removed_cidrs = [cidr for cidr in current_cidrs if cidr not in proposed_cidrs] if proposed_cidrs else []
+
+            if not (added_cidrs or removed_cidrs or proposed_added_cidrs or proposed_removed_cidrs):
+                snapshots[map_id] = snapshot
+                continue
+
+            row = {
+                "mapId": site_shield.get("id"),
+                "ruleName": site_shield.get("ruleName"),
+                "acknowledged": site_shield.get("acknowledged"),
+                "addedCidrs": added_cidrs,
+                "removedCidrs": removed_cidrs,
+                "proposedAddedCidrs": proposed_added_cidrs,
+                "proposedRemovedCidrs": proposed_removed_cidrs,
+            }
+            yield row, snapshot
+
+    def _handle_lookup_ip(self, param):
+        """This function is used to find the network lists that cover IP addresses, using an index of the elements of all IP lists.
+        :param param: Dictionary of input parameters
+        :return: status success/failure
+        """
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        ips = [x.strip() for x in str(param.get("ip", "")).split(",")]
+        ips = list([_f for _f in ips if _f])
+        if not ips:
+            return action_result.set_status(phantom.APP_ERROR, "Please provide valid input value in the 'ip' action parameter")
+
+        addresses = []
+        for ip in ips:
+            try:
+                addresses.append(ipaddress.ip_address(ip))
+            except ValueError:
+                return action_result.set_status(
+                    phantom.APP_ERROR, f"Please provide valid input value in the 'ip' action parameter. Invalid IP: {ip}"
+                )
+
+        ret_val, index = self._get_lookup_index(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        networks = index["networks"]
+        starts = {version: [entry[0] for entry in index[f"ipv{version}"]] for version in (4, 6)}
+
+        num_found = 0
+        for ip, address in zip(ips, addresses):
+            entries = index[f"ipv{address.version}"]
+            matches = [
+                {"uniqueId": entry[3], "name": networks.get(entry[3], {}).get("name"), "element": entry[4]}
+                for entry in self._lookup_address(entries, starts[address.version], int(address))
+            ]
+            if matches:
+                num_found += 1
+            action_result.add_data({"ip": ip, "found": bool(matches), "matches": matches})
+
+        summary = action_result.update_summary({})
+        summary["num_ips"] = len(ips)
+        summary["num_found"] = num_found
+        summary["num_indexed_elements"] = len(index["ipv4"]) + len(index["ipv6"])
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _get_lookup_index(self, action_result):
+        """This function is used to get the lookup index from its file, bringing it up to date with the network lists first.
+        Only the lists whose syncPoint changed since the index was built are downloaded again.
+        :param action_result: object of ActionResult class
+        :return: status success/failure, lookup index
+        """
+        # Cheap read without the elements to get the current syncPoints
+        endpoint = self._process_parameters(AKAMAI_NETWORK_LIST_ENDPOINT, {"includeElements": False})
+        ret_val, r = self._make_stream_call(endpoint, action_result, params=None, headers=None)
+        if phantom.is_fail(ret_val):
+            return RetVal(action_result.get_status(), None)
+
+        try:
+            current_networks = {
+                network_list["uniqueId"]: {"syncPoint": network_list.get("syncPoint"), "name": network_list.get("name")}
+                for network_list in self._iter_json_array(r, "networkLists")
+                if network_list.get("type") == "IP"
+            }
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"Error occurred while processing the response. {error_message}"), None)
+        finally:
+            r.close()
+
+        index = self._load_state_file(LOOKUP_INDEX_FILE_SUFFIX)
+        if not isinstance(index, dict):
+            index = {"networks": {}, "ipv4": [], "ipv6": []}
+
+        changed = [
+            networklistid
+            for networklistid, network in current_networks.items()
+            if index["networks"].get(networklistid, {}).get("syncPoint") != network["syncPoint"]
+        ]
+        dropped = set(changed).union(networklistid for networklistid in index["networks"] if networklistid not in current_networks)
+
+        summary = action_result.update_summary({})
+        summary["refreshed_networks"] = len(changed)
+
+        if not dropped:
+            if index["networks"] != current_networks:
+                # A list was renamed
+                index["networks"] = current_networks
+                self._save_state_file(LOOKUP_INDEX_FILE_SUFFIX, index)
+            return RetVal(phantom.APP_SUCCESS, index)
+
+        ret_val, network_lists = self._fetch_network_elements(action_result, changed)
+        if phantom.is_fail(ret_val):
+            return RetVal(action_result.get_status(), None)
+
+        intervals = {4: [entry[:2] + entry[3:] for entry in index["ipv4"] if entry[3] not in dropped]}
+        intervals[6] = [entry[:2] + entry[3:] for entry in index["ipv6"] if entry[3] not in dropped]
+        for network_list in network_lists:
+            networklistid = network_list["uniqueId"]
+            # The syncPoint of the downloaded copy is the one the elements belong to
+            current_networks[networklistid]["syncPoint"] = network_list.get("syncPoint")
+            for element in network_list.get("list", []):
+                interval = self._get_element_interval(element)
+                if interval is not None:
+                    intervals[interval[0]].append([interval[1], interval[2], networklistid, element])
+
+        index = {
+            "networks": current_networks,
+            "ipv4": self._build_interval_index(intervals[4]),
+            "ipv6": self._build_interval_index(intervals[6]),
+        }
+        self._save_state_file(LOOKUP_INDEX_FILE_SUFFIX, index)
+
+        return RetVal(phantom.APP_SUCCESS, index)
+
+    def _fetch_network_elements(self, action_result, networklistids):
+        """This function is used to download the elements of network lists. A few lists are fetched one by one in parallel,
+        when more lists changed than can be fetched at once a single read of all the lists is cheaper.
+        :param action_result: object of ActionResult class
+        :param networklistids: Unique identifiers of the network lists
+        :return: status success/failure, network list responses
+        """
+        if len(networklistids) > self._max_concurrency:
+            wanted = set(networklistids)
+            endpoint = self._process_parameters(AKAMAI_NETWORK_LIST_ENDPOINT, {"includeElements": True})
+            ret_val, r = self._make_stream_call(endpoint, action_result, params=None, headers=None)
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            try:
+                network_lists = [
+                    network_list for network_list in self._iter_json_array(r, "networkLists") if network_list.get("uniqueId") in wanted
+                ]
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return RetVal(
+                    action_result.set_status(phantom.APP_ERROR, f"Error occurred while processing the response. {error_message}"), None
+                )
+            finally:
+                r.close()
+
+            return RetVal(phantom.APP_SUCCESS, network_lists)
+
+        network_lists = []
+        if not networklistids:
+            return RetVal(phantom.APP_SUCCESS, network_lists)
+
+        fetched = self._run_concurrently(lambda networklistid: self._fetch_network(networklistid, {"includeElements": True}), networklistids)
+
+        for networklistid, (ret_val, response) in zip(networklistids, fetched):
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.set_status(phantom.APP_ERROR, f"Unable to fetch the network list {networklistid}. {response}"), None)
+            network_lists.append(response)
+
+        return RetVal(phantom.APP_SUCCESS, network_lists)
+
     def handle_action(self, param):
         """This function gets current action identifier and calls member function of its own to handle the action.
         :param param: dictionary which contains information about the actions to be executed
@@ -624,20 +2426,92 @@ class AkamaiNetworkListsConnector(BaseConnector):
             "remove_element": self._handle_remove_element,
             "delete_network": self._handle_delete_network,
             "activate_network": self._handle_activate_network,
+            "sync_network": self._handle_sync_network,
             "activation_status": self._handle_activation_status,
+            "wait_activation": self._handle_wait_activation,
             "activation_snapshot": self._handle_activation_snapshot,
             "activation_details": self._handle_activation_details,
             "list_siteshields": self._handle_list_siteshields,
+            "lookup_ip": self._handle_lookup_ip,
         }
 
         action = self.get_action_identifier()
         action_execution_status = phantom.APP_SUCCESS
 
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._timings = RequestTimings()
+        profile_vault_id = None
+
+        start = time.perf_counter()
         if action in list(action_mapping.keys()):
             action_function = action_mapping[action]
-            action_execution_status = action_function(param)
+            if self._profile_actions:
+                action_execution_status, profile_vault_id = self._run_profiled(action, action_function, param)
+            else:
+                action_execution_status = action_function(param)
+        action_seconds = time.perf_counter() - start
+
+        if action in WRITE_ACTIONS:
+            # Invalidate even when the action failed, a chunked append may have committed part of its elements
+            networklistids = [x.strip() for x in str(param.get("networklistid", "")).split(",")]
+            self._cache_invalidate([_f for _f in networklistids if _f])
+
+        new_connections, reused_connections = self._get_connection_stats()
+        timings = self._timings.get_summary(action_seconds)
+        for action_result in self.get_action_results():
+            summary = action_result.update_summary({})
+            summary["new_connections"] = new_connections
+            summary["reused_connections"] = reused_connections
+            summary.update(timings)
+            if profile_vault_id:
+                summary["profile_vault_id"] = profile_vault_id
+
         return action_execution_status
 
+    def _run_profiled(self, action, action_function, param):
+        """This function is used to run an action handler under cProfile and add the profile to the vault of the container.
+        Only the thread running the handler is profiled, not the workers of the actions that make concurrent requests.
+        :param action: Action identifier
+        :param action_function: Action handler
+        :param param: Dictionary of input parameters
+        :return: status success/failure of the action, vault ID of the profile or None when it could not be added
+        """
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            action_execution_status = profiler.runcall(action_function, param)
+        finally:
+            vault_id = self._save_profile(action, profiler)
+
+        return action_execution_status, vault_id
+
+    def _save_profile(self, action, profiler):
+        """This function is used to add a profile to the vault of the container, in the pstats format.
+        :param action: Action identifier
+        :param profiler: cProfile profiler the action ran under
+        :return: vault ID or None when the profile could not be added
+        """
+        import phantom.rules as phantom_rules
+        from phantom.vault import Vault
+
+        file_name = f"{action}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{PROFILE_FILE_EXTENSION}"
+
+        try:
+            file_path = os.path.join(Vault.get_vault_tmp_dir(), file_name)
+            profiler.dump_stats(file_path)
+            success, message, vault_id = phantom_rules.vault_add(container=self.get_container_id(), file_location=file_path, file_name=file_name)
+        except Exception as e:
+            self.debug_print(f"Unable to add the profile to the vault. {self._get_error_message_from_exception(e)}")
+            return None
+
+        if not success:
+            self.debug_print(f"Unable to add the profile to the vault. {message}")
+            return None
+
+        return vault_id
+
     def _process_parameters(self, endpoint, params):
         """This function is used process the parameters and creates a valid endpoint URL.
         :param endpoint: The endpoint we want to send data to
@@ -661,6 +2535,377 @@ class AkamaiNetworkListsConnector(BaseConnector):
 
         return endpoint
 
+    def _normalize_element(self, element):
+        """This function is used to convert a network list element to its canonical form so equal elements compare equal.
+        e.g. '10.0.0.1/32' becomes '10.0.0.1' and '2001:DB8::0/64' becomes '2001:db8::/64'. Non IP elements are returned unchanged.
+
+        :param element: Network list element
+        :return: canonical element
+        """
+        # Fast path for IPv4 addresses and CIDRs that are already canonical, which is what network lists mostly hold
+        match = IPV4_ELEMENT_REGEX.match(element)
+        if match:
+            prefix = match.group(1)
+            if prefix is None:
+                return element
+            if prefix != "32":
+                host_mask = (1 << (32 - int(prefix))) - 1
+                if not int.from_bytes(socket.inet_aton(element[: match.start(1) - 1]), "big") & host_mask:
+                    return element
+
+        try:
+            network = ipaddress.ip_network(element, strict=False)
+        except ValueError:
+            return element
+
+        return self._format_network(network)
+
+    def _classify_element(self, element):
+        """This function is used to classify a network list element without raising exceptions for the common cases.
+        IPv4 addresses and CIDRs and GEO country and subdivision codes are matched with precompiled patterns, only IPv6 candidates are parsed.
+
+        :param element: Network list element
+        :return: element class or None when the element is invalid
+        """
+        match = IPV4_ELEMENT_REGEX.match(element)
+        if match:
+            return ELEMENT_CLASS_IPV4 if match.group(1) is None else ELEMENT_CLASS_IPV4_CIDR
+
+        if GEO_ELEMENT_REGEX.match(element):
+            return ELEMENT_CLASS_GEO
+
+        if ":" not in element:
+            return None
+
+        try:
+            ipaddress.ip_network(element, strict=False)
+        except ValueError:
+            return None
+
+        return ELEMENT_CLASS_IPV6_CIDR if "/" in element else ELEMENT_CLASS_IPV6
+
+    def _is_valid_element(self, element, list_type):
+        """This function is used to check whether an element can be held by a network list of the given type.
+
+        :param element: Network list element
+        :param list_type: Network list type from TYPE_VALUE_LIST
+        :return: True if the element is valid
+        """
+        element_class = self._classify_element(element)
+        if list_type == "GEO":
+            return element_class == ELEMENT_CLASS_GEO
+
+        return element_class not in (None, ELEMENT_CLASS_GEO)
+
+    def _get_invalid_elements_message(self, list_type, num_invalid, invalid):
+        """This function is used to build the message that reports invalid elements.
+
+        :param list_type: Network list type from TYPE_VALUE_LIST
+        :param num_invalid: Number of invalid elements
+        :param invalid: The first invalid elements
+        :return: message
+        """
+        message = f"Found {num_invalid} element(s) that are not valid for the {list_type} network list type: {', '.join(invalid)}"
+        if num_invalid > len(invalid):
+            message = f"{message}, ..."
+
+        return message
+
+    def _validate_elements(self, action_result, elements, list_type, invalid_elements):
+        """This function is used to check the elements against the network list type before they are sent.
+        Every element is classified in a single pass, the ones that are malformed or do not belong to the list type are invalid.
+
+        :param action_result: object of ActionResult class
+        :param elements: Network list elements
+        :param list_type: Network list type from TYPE_VALUE_LIST
+        :param invalid_elements: 'fail' to fail the action on invalid elements, 'drop' to leave them out
+        :return: status success/failure, valid elements
+        """
+        if invalid_elements not in INVALID_ELEMENTS_VALUE_LIST:
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR, f"Please provide valid input from {INVALID_ELEMENTS_VALUE_LIST} in 'invalid_elements' action parameter"
+                ),
+                None,
+            )
+
+        classify = self._classify_element
+        element_classes = [classify(element) for element in elements]
+
+        if list_type == "GEO":
+            valid_elements = [element for element, element_class in zip(elements, element_classes) if element_class == ELEMENT_CLASS_GEO]
+        else:
+            valid_elements = [
+                element for element, element_class in zip(elements, element_classes) if element_class not in (None, ELEMENT_CLASS_GEO)
+            ]
+
+        num_invalid = len(elements) - len(valid_elements)
+        if not num_invalid:
+            return RetVal(phantom.APP_SUCCESS, valid_elements)
+
+        valid = set(valid_elements)
+        invalid = [element for element in elements if element not in valid][:INVALID_ELEMENTS_MSG_LIMIT]
+        message = self._get_invalid_elements_message(list_type, num_invalid, invalid)
+
+        if invalid_elements == "fail":
+            return RetVal(action_result.set_status(phantom.APP_ERROR, message), None)
+
+        if not valid_elements:
+            return RetVal(action_result.set_status(phantom.APP_ERROR, f"{message}. No valid elements are left to send"), None)
+
+        self.save_progress(f"{message}. Dropping them")
+        summary = action_result.update_summary({})
+        summary["num_invalid"] = num_invalid
+
+        return RetVal(phantom.APP_SUCCESS, valid_elements)
+
+    def _get_element_interval(self, element):
+        """This function is used to convert an IP network list element to the range of addresses it covers.
+
+        :param element: Network list element
+        :return: (IP version, first address, last address) as integers, None for elements that are not IP addresses or CIDRs
+        """
+        match = IPV4_ELEMENT_REGEX.match(element)
+        if match:
+            prefix = match.group(1)
+            if prefix is None:
+                start = int.from_bytes(socket.inet_aton(element), "big")
+                return 4, start, start
+            host_mask = (1 << (32 - int(prefix))) - 1
+            start = int.from_bytes(socket.inet_aton(element[: match.start(1) - 1]), "big") & ~host_mask
+            return 4, start, start | host_mask
+
+        try:
+            network = ipaddress.ip_network(element, strict=False)
+        except ValueError:
+            return None
+
+        return network.version, int(network.network_address), int(network.broadcast_address)
+
+    def _build_interval_index(self, intervals):
+        """This function is used to build a sorted interval array from [first address, last address, network list ID, element] entries.
+        CIDR ranges are either nested or disjoint, so each entry gets a pointer to the nearest entry that contains it.
+
+        :param intervals: List of [first address, last address, network list ID, element]
+        :return: List of [first address, last address, parent position or -1, network list ID, element] sorted by range
+        """
+        intervals.sort(key=lambda interval: (interval[0], -interval[1]))
+
+        index = []
+        stack = []
+        for start, end, networklistid, element in intervals:
+            while stack and index[stack[-1]][1] < start:
+                stack.pop()
+            index.append([start, end, stack[-1] if stack else -1, networklistid, element])
+            stack.append(len(index) - 1)
+
+        return index
+
+    def _lookup_address(self, index, starts, address):
+        """This function is used to find the entries of an interval index that contain an address, most specific first.
+        Every entry containing the address is an ancestor of the last entry starting at or before it, so this is
+        a binary search followed by a walk up at most one entry per prefix length.
+
+        :param index: Interval index built by _build_interval_index
+        :param starts: First addresses of the index entries
+        :param address: Address as an integer
+        :return: list of matching entries
+        """
+        matches = []
+        position = bisect.bisect_right(starts, address) - 1
+        while position >= 0:
+            entry = index[position]
+            if entry[1] >= address:
+                matches.append(entry)
+            position = entry[2]
+
+        return matches
+
+    def _format_network(self, network):
+        """This function is used to format a network the way network lists store it, single hosts without a prefix length.
+
+        :param network: IPv4Network or IPv6Network object
+        :return: network list element
+        """
+        if network.prefixlen == network.max_prefixlen:
+            return str(network.network_address)
+
+        return str(network)
+
+    def _aggregate_elements(self, elements):
+        """This function is used to de-duplicate elements and collapse overlapping or adjacent IPv4 and IPv6 ranges.
+        Elements that are not IP addresses or CIDRs (e.g. GEO country codes) are only de-duplicated.
+
+        :param elements: Network list elements
+        :return: aggregated elements, number of entries eliminated
+        """
+        ipv4_networks = []
+        ipv6_networks = []
+        other_elements = {}
+        for element in elements:
+            try:
+                network = ipaddress.ip_network(element, strict=False)
+            except ValueError:
+                other_elements.setdefault(element, None)
+                continue
+
+            if network.version == 4:
+                ipv4_networks.append(network)
+            else:
+                ipv6_networks.append(network)
+
+        aggregated_elements = [self._format_network(network) for network in ipaddress.collapse_addresses(ipv4_networks)]
+        aggregated_elements.extend(self._format_network(network) for network in ipaddress.collapse_addresses(ipv6_networks))
+        aggregated_elements.extend(other_elements)
+
+        return aggregated_elements, len(elements) - len(aggregated_elements)
+
+    def _diff_elements(self, current_elements, elements):
+        """This function is used to remove elements from a network list using hashed lookups of the canonical forms.
+
+        :param current_elements: Elements currently on the network list
+        :param elements: Elements to remove
+        :return: remaining elements, removed elements, elements that are not present on the list
+        """
+        pending = {}
+        for element in elements:
+            pending.setdefault(self._normalize_element(element), element)
+
+        remaining_elements = []
+        removed_elements = []
+        matched = set()
+        for element in current_elements:
+            key = self._normalize_element(element)
+            if key in pending:
+                removed_elements.append(element)
+                matched.add(key)
+            else:
+                remaining_elements.append(element)
+
+        not_present_elements = [element for key, element in pending.items() if key not in matched]
+
+        return remaining_elements, removed_elements, not_present_elements
+
+    def _load_state_file(self, suffix):
+        """This function is used to load data kept in a file of the app state directory instead of the state.
+        :param suffix: Suffix of the file name, after the asset ID
+        :return: data, None when the file does not exist or cannot be read
+        """
+        try:
+            with open(os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_{suffix}")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state_file(self, suffix, data):
+        """This function is used to save data to a file of the app state directory. It is written to a temporary file that
+        replaces the previous one, so an action running at the same time reads either the old or the new data. The data
+        is only kept to save work in the next runs, a failure to save it is logged and does not fail the action.
+        :param suffix: Suffix of the file name, after the asset ID
+        :param data: JSON serializable data
+        """
+        import tempfile
+
+        path = os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_{suffix}")
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except Exception as e:
+            if temp_path:
+                with contextlib.suppress(OSError):
+                    os.unlink(temp_path)
+            self.debug_print(f"Unable to save {path}. {self._get_error_message_from_exception(e)}")
+
+    def _get_cache_key(self, endpoint, params):
+        """This function is used to build the cache key of a read, the query parameters are part of the key.
+        :param endpoint: The endpoint that is read
+        :param params: Dictionary of query parameters
+        :return: cache key
+        """
+        return self._process_parameters(endpoint, dict(sorted(params.items())))
+
+    def _get_cache(self):
+        """This function is used to get the response cache, loaded from its file by the first action that uses it.
+        It holds whole network lists, so it is not part of the state every action loads and saves.
+        :return: dictionary of cache key to cache entry
+        """
+        if self._cache is None:
+            with self._cache_lock:
+                if self._cache is None:
+                    cache = self._load_state_file(CACHE_FILE_SUFFIX)
+                    self._cache = cache if isinstance(cache, dict) else {}
+
+        return self._cache
+
+    def _cache_get(self, key):
+        """This function is used to get a fresh cached response.
+        :param key: Cache key
+        :return: cached response or None
+        """
+        if not self._cache_ttl:
+            return None
+
+        entry = self._get_cache().get(key)
+        now = time.time()
+        if entry is None or now - entry.get("timestamp", 0) > self._cache_ttl:
+            self._cache_misses += 1
+            return None
+
+        entry["last_used"] = now
+        self._cache_changed = True
+        self._cache_hits += 1
+        return entry.get("data")
+
+    def _cache_peek(self, key):
+        """This function is used to get a cache entry regardless of its age, without counting it as a hit or miss.
+        :param key: Cache key
+        :return: cache entry or None
+        """
+        return self._get_cache().get(key)
+
+    def _cache_put(self, key, data, networklistid=None, force=False):
+        """This function is used to cache a response, evicting the least recently used entries above the size cap.
+        :param key: Cache key
+        :param data: Response to cache
+        :param networklistid: Unique identifier of the network list the response belongs to, None for reads across lists
+        :param force: Store the response even when the TTL cache is disabled, used by the incremental reads
+        """
+        if not self._cache_ttl and not force:
+            return
+
+        cache = self._get_cache()
+        now = time.time()
+        # The concurrent reads of 'get network' cache their responses from several threads
+        with self._cache_lock:
+            cache[key] = {
+                "timestamp": now,
+                "last_used": now,
+                "networklistid": networklistid,
+                "syncPoint": data.get("syncPoint"),
+                "data": data,
+            }
+
+            while len(cache) > self._cache_max_entries:
+                del cache[min(cache, key=lambda cache_key: cache[cache_key].get("last_used", 0))]
+
+            self._cache_changed = True
+
+    def _cache_invalidate(self, networklistids):
+        """This function is used to drop the cached responses of network lists that were written to,
+        along with the reads across lists since they contain those lists too.
+        :param networklistids: Unique identifiers of the network lists
+        """
+        cache = self._get_cache()
+        with self._cache_lock:
+            for key in list(cache):
+                networklistid = cache[key].get("networklistid")
+                if networklistid is None or networklistid in networklistids:
+                    del cache[key]
+                    self._cache_changed = True
+
     def _validate_ip(self, input_ip_address):
         """
         Function that checks given address and return True if address is valid IPv4 or IPV6 address.
@@ -668,16 +2913,14 @@ class AkamaiNetworkListsConnector(BaseConnector):
         :param input_ip_address: IP address
         :return: status (success/failure)
         """
-        try:
-            ipaddress.ip_address(input_ip_address)
-        except Exception:
-            return False
-        return True
+        return self._classify_element(str(input_ip_address)) in (ELEMENT_CLASS_IPV4, ELEMENT_CLASS_IPV6)
 
     def initialize(self):
         # Load the state in initialize, use it to store data
         # that needs to be accessed across actions
         self._state = self.load_state()
+        if not isinstance(self._state, dict):
+            self._state = {}
 
         # set validator for ip
         self.set_validator("ip", self._validate_ip)
@@ -690,20 +2933,85 @@ class AkamaiNetworkListsConnector(BaseConnector):
         self._client_secret = config.get("client_secret")
         self._access_token = config.get("access_token")
 
+        ret_val, self._pool_size = self._validate_integer(self, config.get("pool_size", DEFAULT_POOL_SIZE), POOL_SIZE_KEY, allow_zero=False)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._max_concurrency = self._validate_integer(
+            self, config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY), MAX_CONCURRENCY_KEY, allow_zero=False
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._cache_ttl = self._validate_integer(self, config.get("cache_ttl", DEFAULT_CACHE_TTL), CACHE_TTL_KEY)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._cache_max_entries = self._validate_integer(
+            self, config.get("cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES), CACHE_MAX_ENTRIES_KEY, allow_zero=False
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._max_retries = self._validate_integer(self, config.get("max_retries", DEFAULT_MAX_RETRIES), MAX_RETRIES_KEY)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._connect_timeout = self._validate_integer(
+            self, config.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT), CONNECT_TIMEOUT_KEY, allow_zero=False
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._read_timeout = self._validate_integer(
+            self, config.get("read_timeout", DEFAULT_TIMEOUT), READ_TIMEOUT_KEY, allow_zero=False
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._rate_limit = self._validate_integer(self, config.get("rate_limit", DEFAULT_RATE_LIMIT), RATE_LIMIT_KEY)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._rate_burst = self._validate_integer(self, config.get("rate_burst", DEFAULT_RATE_BURST), RATE_BURST_KEY, allow_zero=False)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._debug_failures_only = config.get("debug_failures_only", False)
+        self._profile_actions = config.get("profile_actions", False)
+        self._compress_requests = config.get("compress_requests", False)
+
+        ret_val, self._max_rebases = self._validate_integer(self, config.get("max_rebases", DEFAULT_MAX_REBASES), MAX_REBASES_KEY)
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._debug_body_limit = self._validate_integer(
+            self, config.get("debug_body_limit", DEFAULT_DEBUG_BODY_LIMIT), DEBUG_BODY_LIMIT_KEY
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
         # Save the state, this data is saved across actions and app upgrades
         self.save_state(self._state)
+
+        if self._cache_changed:
+            self._save_state_file(CACHE_FILE_SUFFIX, self._cache)
+            self._cache_changed = False
+
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
         return phantom.APP_SUCCESS
 
 
 if __name__ == "__main__":
     import argparse
 
-    import pudb
-
-    pudb.set_trace()
+    import requests
 
     argparser = argparse.ArgumentParser()
 
@@ -711,8 +3019,14 @@ if __name__ == "__main__":
     argparser.add_argument("-u", "--username", help="username", required=False)
     argparser.add_argument("-p", "--password", help="password", required=False)
     argparser.add_argument("-v", "--verify", action="store_true", help="verify", required=False, default=False)
+    argparser.add_argument("-d", "--debug", action="store_true", help="break into the pudb debugger", required=False, default=False)
 
     args = argparser.parse_args()
+
+    if args.debug:
+        import pudb
+
+        pudb.set_trace()
     session_id = None
 
     username = args.username
@@ -10,6 +10,52 @@ AKAMAI_NETWORK_LIST_ENDPOINT = "network-lists"
 AKAMAI_ACTIVATIONS_ENDPOINT = "activations"
 
 DEFAULT_TIMEOUT = 30
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_CONCURRENCY = 5
+DEFAULT_CACHE_TTL = 0
+DEFAULT_CACHE_MAX_ENTRIES = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_REBASES = 3
+DEFAULT_RATE_LIMIT = 0
+DEFAULT_RATE_BURST = 10
+DEFAULT_DEBUG_BODY_LIMIT = 0
+DEFAULT_ACTIVATION_WAIT_TIMEOUT = 900
+DEFAULT_VAULT_CHUNK_SIZE = 5000
+
+# Constants relating to '_send_request' retries
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+RETRY_BACKOFF_BASE = 1
+RETRY_MAX_DELAY = 60
+
+# Status codes of an update sent with a syncPoint that is out of date
+SYNCPOINT_CONFLICT_STATUS_CODES = [409, 412]
+
+# Number of bytes read at a time from streamed responses
+STREAM_CHUNK_SIZE = 65536
+
+# Content encoding the responses are asked for, decompressed as they are read
+ACCEPT_ENCODING = "gzip"
+
+# Constants relating to the gzip compression of request bodies enabled by 'compress_requests'
+REQUEST_COMPRESSION_MIN_SIZE = 2048
+REQUEST_COMPRESSION_LEVEL = 6
+
+# Phases of the REST calls timed by 'RequestTimings', reported as '<phase>_seconds' in the action summary
+TIMING_PHASES = ["connect", "ttfb", "download", "parse", "wait"]
+
+# Extension of the cProfile dumps added to the vault when 'profile_actions' is enabled
+PROFILE_FILE_EXTENSION = "pstats"
+
+# Constants relating to '_wait_for_activation'
+ACTIVATION_POLL_INITIAL_INTERVAL = 5
+ACTIVATION_POLL_MAX_INTERVAL = 60
+ACTIVATION_POLL_BACKOFF = 1.5
+ACTIVATION_PENDING_STATUSES = ["PENDING_ACTIVATION", "PENDING_DEACTIVATION"]
+ACTIVATION_FAILED_STATUSES = ["FAILED"]
+
+# Client side request bucket shared by the actions of an asset, stored in the app state directory
+RATE_LIMIT_FILE_SUFFIX = "rate_limit.json"
 
 # Constants relating to '_get_error_message_from_exception'
 ERROR_CODE_MSG = "Error code unavailable"
@@ -20,9 +66,61 @@ TYPE_ERROR_MSG = "Error occurred while connecting to the Akamai WAF Server. Plea
 # Constants relating to '_validate_integer'
 VALID_INTEGER_MSG = "Please provide a valid integer value in the {}"
 NON_NEGATIVE_INTEGER_MSG = "Please provide a valid non-negative integer value in the {}"
+POSITIVE_INTEGER_MSG = "Please provide a valid non-zero positive integer value in the {}"
 SYNCPOINT_KEY = "'syncpoint' action parameter"
 ACTIVATIONID_KEY = "'activationid' action parameter"
+POOL_SIZE_KEY = "'pool_size' asset configuration parameter"
+MAX_CONCURRENCY_KEY = "'max_concurrency' asset configuration parameter"
+CHUNK_SIZE_KEY = "'chunk_size' action parameter"
+CACHE_TTL_KEY = "'cache_ttl' asset configuration parameter"
+CACHE_MAX_ENTRIES_KEY = "'cache_max_entries' asset configuration parameter"
+MAX_RETRIES_KEY = "'max_retries' asset configuration parameter"
+MAX_REBASES_KEY = "'max_rebases' asset configuration parameter"
+CONNECT_TIMEOUT_KEY = "'connect_timeout' asset configuration parameter"
+READ_TIMEOUT_KEY = "'read_timeout' asset configuration parameter"
+RATE_LIMIT_KEY = "'rate_limit' asset configuration parameter"
+RATE_BURST_KEY = "'rate_burst' asset configuration parameter"
+DEBUG_BODY_LIMIT_KEY = "'debug_body_limit' asset configuration parameter"
+WAIT_TIMEOUT_KEY = "'wait_timeout' action parameter"
+TIMEOUT_KEY = "'timeout' action parameter"
+LIMIT_KEY = "'limit' action parameter"
+OFFSET_KEY = "'offset' action parameter"
+
+# Constants relating to the connector state
+APPEND_PROGRESS_STATE_KEY = "append_progress"
+SITESHIELD_SNAPSHOT_STATE_KEY = "siteshield_snapshot"
+
+# Data too large for the state, which every action loads and saves, kept in files of the app state directory
+CACHE_FILE_SUFFIX = "cache.json"
+LOOKUP_INDEX_FILE_SUFFIX = "lookup_index.json"
+
+# Dotted quad IPv4 address or CIDR without leading zeros, the prefix length is captured
+IPV4_ELEMENT_PATTERN = r"^(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(?:/(3[0-2]|[12]?\d))?$"
+
+# ISO 3166 two letter country code, or country subdivision code (e.g. US-CA), held by GEO network lists
+GEO_ELEMENT_PATTERN = r"^[A-Za-z]{2}(-[A-Za-z0-9]{1,3})?$"
+
+# Constants relating to '_validate_elements'
+ELEMENT_CLASS_IPV4 = "IPv4"
+ELEMENT_CLASS_IPV4_CIDR = "IPv4 CIDR"
+ELEMENT_CLASS_IPV6 = "IPv6"
+ELEMENT_CLASS_IPV6_CIDR = "IPv6 CIDR"
+ELEMENT_CLASS_GEO = "GEO"
+INVALID_ELEMENTS_MSG_LIMIT = 10
 
 # Constants relating to value_list check
 ENVIRONMENT_VALUE_LIST = ["PRODUCTION", "STAGING"]
+ACTIVATE_ENVIRONMENT_VALUE_LIST = ["PRODUCTION", "STAGING", "BOTH"]
 TYPE_VALUE_LIST = ["IP", "GEO"]
+INVALID_ELEMENTS_VALUE_LIST = ["fail", "drop"]
+
+# Actions that modify network lists, the cached reads of those lists are invalidated after they run
+WRITE_ACTIONS = [
+    "create_network",
+    "update_network",
+    "add_element",
+    "remove_element",
+    "delete_network",
+    "activate_network",
+    "sync_network",
+]
@@ -0,0 +1,132 @@
+# File: check_json_stream.py
+#
+# Copyright (c) Robert Drouin, 2021-2026
+#
+# Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
+#
+# Checks that the streamed JSON parser of the connector reads the same items and fields as json.loads,
+# wherever the chunks of the response body split the document
+import argparse
+import json
+import os
+import random
+import sys
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+# Values that end on a character a longer value could go on with, the cases a chunk boundary can cut short
+EDGE_VALUES = [0, 7, -3, 12, 12.5, -0.25, 1e5, 2.5e-3, -1e10, 1e100, True, False, None, "", "10.0.0.0/24", 'a "quoted" \\ value', "ünïcödé ✓"]
+
+
+class ChunkedRaw:
+    """Stands in for the urllib3 response of a streamed request, returning the body in the given chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def stream(self, amt, decode_content=False):
+        yield from self._chunks
+
+
+class ChunkedResponse:
+    """Stands in for the requests response of a streamed request."""
+
+    def __init__(self, chunks):
+        self.encoding = "utf-8"
+        self.headers = {}
+        self.raw = ChunkedRaw(chunks)
+
+
+def random_value(rng, depth=0):
+    """This function is used to generate a random JSON value, mostly numbers and strings.
+
+    :param rng: random.Random instance
+    :param depth: Nesting depth of the value
+    :return: value
+    """
+    kind = rng.randrange(7 if depth < 2 else 5)
+    if kind == 0:
+        return rng.choice(EDGE_VALUES)
+    if kind == 1:
+        return rng.randint(-(10**12), 10**12)
+    if kind == 2:
+        return float(f"{rng.uniform(-1000, 1000):.{rng.randint(1, 6)}e}")
+    if kind == 3:
+        return round(rng.uniform(-100, 100), rng.randint(1, 4))
+    if kind == 4:
+        return "".join(rng.choice('0123456789.:/abcdef"\\é') for _ in range(rng.randint(0, 12)))
+    if kind == 5:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    return {f"k{index}": random_value(rng, depth + 1) for index in range(rng.randint(0, 3))}
+
+
+def random_document(rng):
+    """This function is used to generate a random 'list networks' like document, with fields before and after the array.
+
+    :param rng: random.Random instance
+    :return: document
+    """
+    fields = {name: random_value(rng) for name in rng.sample(["syncPoint", "links", "total", "note"], rng.randint(0, 4))}
+    split = rng.randint(0, len(fields))
+    document = dict(list(fields.items())[:split])
+    document["networkLists"] = [random_value(rng) for _ in range(rng.randint(0, 6))]
+    document.update(list(fields.items())[split:])
+    return document
+
+
+def check(connector, body, document):
+    """This function is used to parse a body split in two at every byte, and in chunks of one byte.
+
+    :param connector: AkamaiNetworkListsConnector instance
+    :param body: Encoded document
+    :param document: Document the parser must return
+    :return: list of the splits the parser failed on
+    """
+    expected_fields = {name: value for name, value in document.items() if name != "networkLists"}
+    splits = [[body[:index], body[index:]] for index in range(len(body) + 1)]
+    splits.append([body[index : index + 1] for index in range(len(body))])
+
+    failures = []
+    for chunks in splits:
+        fields = {}
+        try:
+            items = list(connector._iter_json_array(ChunkedResponse([chunk for chunk in chunks if chunk]), "networkLists", fields))
+        except ValueError as e:
+            failures.append((chunks, str(e)))
+            continue
+        if items != document["networkLists"] or fields != expected_fields:
+            failures.append((chunks, f"parsed {items!r} and {fields!r}"))
+    return failures
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Check the streamed JSON parser of the connector at every chunk boundary")
+    argparser.add_argument("-n", "--num-documents", type=int, default=300, help="Number of random documents to check")
+    argparser.add_argument("--seed", type=int, default=0, help="Seed of the random documents")
+    args = argparser.parse_args()
+
+    from akamaiwaf_connector import AkamaiNetworkListsConnector
+
+    connector = AkamaiNetworkListsConnector()
+    rng = random.Random(args.seed)
+    documents = [{"networkLists": [value], "syncPoint": value} for value in EDGE_VALUES]
+    documents += [{"syncPoint": value, "networkLists": EDGE_VALUES} for value in EDGE_VALUES]
+    documents += [random_document(rng) for _ in range(args.num_documents)]
+
+    failed = 0
+    for document in documents:
+        for separators in ((",", ":"), (", ", ": ")):
+            failures = check(connector, json.dumps(document, separators=separators, ensure_ascii=False).encode("utf-8"), document)
+            if failures:
+                failed += 1
+                chunks, error = failures[0]
+                print(f"FAIL {len(failures)} split(s) of {chunks!r}: {error}")
+
+    print(f"{len(documents) * 2 - failed} of {len(documents) * 2} documents parsed at every chunk boundary")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
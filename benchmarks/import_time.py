@@ -0,0 +1,120 @@
+# File: import_time.py
+#
+# Copyright (c) Robert Drouin, 2021-2026
+#
+# Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
+#
+# Measures the time a fresh interpreter takes to import the connector, which every action run pays,
+# optionally against another checkout of the app to show the difference
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+IMPORT_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {app_dir!r})
+start = time.perf_counter()
+import akamaiwaf_connector
+print(json.dumps({{"import_seconds": time.perf_counter() - start, "modules": len(sys.modules)}}))
+"""
+
+
+def measure_import(app_dir, repeat):
+    """This function is used to import the connector of an app checkout in fresh interpreters.
+
+    :param app_dir: Directory holding akamaiwaf_connector.py
+    :param repeat: Number of interpreters to start
+    :return: list of measurements
+    """
+    runs = []
+    # The first run writes the bytecode cache when it can, the actions run from a cached module too
+    for _ in range(repeat + 1):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(app_dir=app_dir)], capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return runs[1:]
+
+
+def get_heaviest_imports(app_dir, count):
+    """This function is used to list the modules that take the longest to import with the connector, from -X importtime.
+
+    :param app_dir: Directory holding akamaiwaf_connector.py
+    :param count: Number of modules to list
+    :return: list of (cumulative microseconds, module name) of the modules imported directly by the connector
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {app_dir!r}); import akamaiwaf_connector"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    # A module is listed after the modules it imports, one level of indentation deeper
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        depth = len(name) - len(name.lstrip())
+        if depth == 1:
+            if name.strip() == "akamaiwaf_connector":
+                return sorted(imports, reverse=True)[:count]
+            imports = []
+        elif depth == 3:
+            imports.append((int(cumulative), name.strip()))
+
+    return []
+
+
+def summarize(runs):
+    import_seconds = [run["import_seconds"] for run in runs]
+    return {"median": statistics.median(import_seconds), "min": min(import_seconds), "modules": runs[-1]["modules"]}
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Measure the import time of the connector in fresh interpreters")
+    argparser.add_argument("-r", "--repeat", type=int, default=20, help="Number of interpreters to start")
+    argparser.add_argument("--app-dir", default=APP_DIR, help="Checkout of the app to measure, this one by default")
+    argparser.add_argument("--compare-dir", help="Other checkout of the app to measure and compare with, e.g. a git worktree of the base branch")
+    argparser.add_argument("--top", type=int, default=10, help="Number of heaviest direct imports to list")
+    args = argparser.parse_args()
+
+    checkouts = [("app", os.path.abspath(args.app_dir))]
+    if args.compare_dir:
+        checkouts.append(("compare", os.path.abspath(args.compare_dir)))
+
+    results = {}
+    for label, app_dir in checkouts:
+        results[label] = summarize(measure_import(app_dir, args.repeat))
+        print(f"{label}: {app_dir}")
+        print(
+            f"  import median {results[label]['median'] * 1000:.1f} ms, min {results[label]['min'] * 1000:.1f} ms, "
+            f"{results[label]['modules']} modules loaded"
+        )
+        print("  heaviest direct imports:")
+        for cumulative, name in get_heaviest_imports(app_dir, args.top):
+            print(f"    {cumulative / 1000:>8.1f} ms  {name}")
+
+    if args.compare_dir:
+        saved = results["compare"]["median"] - results["app"]["median"]
+        print(
+            f"\nThe app imports {abs(saved) * 1000:.1f} ms ({abs(saved) / results['compare']['median']:.0%}) "
+            f"{'faster' if saved >= 0 else 'slower'} than the compared checkout"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+# File: mock_server.py
+#
+# Copyright (c) Robert Drouin, 2021-2026
+#
+# Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
+#
+# Local stand-in for the Akamai Network Lists v2 and Site Shield v1 APIs, used by the benchmarks
+import gzip
+import json
+import posixpath
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+NETWORK_LIST_PATH = "/network-list/v2/network-lists"
+ACTIVATIONS_PATH = "/network-list/v2/activations"
+SITESHIELD_MAPS_PATH = "/siteshield/v1/maps"
+
+
+class _CountingStream:
+    """Wraps the socket file of a request and counts the bytes that go through it."""
+
+    def __init__(self, stream, counters, key):
+        self._stream = stream
+        self._counters = counters
+        self._key = key
+
+    def _count(self, data):
+        with self._counters["lock"]:
+            self._counters[self._key] += len(data)
+        return data
+
+    def read(self, *args):
+        return self._count(self._stream.read(*args))
+
+    def readline(self, *args):
+        return self._count(self._stream.readline(*args))
+
+    def write(self, data):
+        self._count(data)
+        return self._stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes bursts of concurrent connections wait for SYN retries
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # The connector closes the kept-alive connections it does not need anymore
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockNetworkListsServer:
+    """Serves generated network lists and site shield maps over HTTP on a local port.
+
+    :param latency: Number of seconds every request is delayed by
+    :param throttle_every: Answer every Nth request with a 429 and a Retry-After of 0 seconds, 0 to never throttle
+    :param gzip_responses: Gzip the response bodies of the requests that accept it
+    :param gzip_requests: Accept gzip request bodies, they are answered with a 415 otherwise
+    """
+
+    def __init__(self, latency=0, throttle_every=0, gzip_responses=True, gzip_requests=True):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.gzip_responses = gzip_responses
+        self.gzip_requests = gzip_requests
+        self.network_lists = {}
+        self.site_shield_maps = []
+        self.activations = {}
+        self.counters = {"lock": threading.Lock(), "requests": 0, "throttled": 0, "bytes_in": 0, "bytes_out": 0}
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def start(self):
+        server = self
+
+        class Handler(_RequestHandler):
+            mock = server
+
+        self._httpd = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def reset_counters(self):
+        with self.counters["lock"]:
+            for key in ("requests", "throttled", "bytes_in", "bytes_out"):
+                self.counters[key] = 0
+
+    def get_counters(self):
+        with self.counters["lock"]:
+            return {key: value for key, value in self.counters.items() if key != "lock"}
+
+    def populate(self, num_lists=10, num_elements=1000, num_maps=10, num_cidrs=100):
+        """This function is used to replace the data served with generated network lists and site shield maps.
+
+        :param num_lists: Number of IP network lists
+        :param num_elements: Number of elements of every network list, a mix of IPv4 addresses and /24 CIDRs
+        :param num_maps: Number of site shield maps
+        :param num_cidrs: Number of current CIDRs of every site shield map
+        """
+        with self._lock:
+            self.network_lists = {}
+            self.activations = {}
+            for index in range(num_lists):
+                elements = [self.generate_element(index, position) for position in range(num_elements)]
+                self.add_network_list(f"{1000 + index}_BENCHMARK{index}", "IP", elements)
+
+            self.site_shield_maps = [
+                {
+                    "id": 2000 + index,
+                    "ruleName": f"map{index}.akamai.net",
+                    "currentCidrs": [f"{100 + index % 100}.{position // 256 % 256}.{position % 256}.0/24" for position in range(num_cidrs)],
+                    "proposedCidrs": [],
+                    "acknowledged": True,
+                }
+                for index in range(num_maps)
+            ]
+
+    @staticmethod
+    def generate_element(list_index, position):
+        """This function is used to generate the element at a position of a generated network list, unique across lists.
+
+        :param list_index: Index of the network list
+        :param position: Position of the element in the list
+        :return: IPv4 address, or a /24 CIDR for every tenth position
+        """
+        value = (list_index << 20) + position
+        first_octet = 11 + (value >> 24) % 200
+        if position % 10 == 9:
+            return f"{first_octet}.{(value >> 16) & 255}.{(value >> 8) & 255}.0/24"
+        return f"{first_octet}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+    def add_network_list(self, unique_id, list_type, elements, name=None):
+        self.network_lists[unique_id] = {
+            "uniqueId": unique_id,
+            "name": name or unique_id,
+            "type": list_type,
+            "description": "Benchmark network list",
+            "syncPoint": 1,
+            "readOnly": False,
+            "shared": False,
+            "networkListType": "networkListResponse",
+            "list": list(elements),
+        }
+
+    def get_network_list_ids(self):
+        return list(self.network_lists)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock = None
+
+    def setup(self):
+        super().setup()
+        self.rfile = _CountingStream(self.rfile, self.mock.counters, "bytes_in")
+        self.wfile = _CountingStream(self.wfile, self.mock.counters, "bytes_out")
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _send_json(self, status_code, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        if self.mock.gzip_responses and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            payload = gzip.compress(payload, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        body = self.rfile.read(length)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return json.loads(body)
+
+    def _dispatch(self, method):
+        mock = self.mock
+        rejected = self.headers.get("Content-Encoding") == "gzip" and not mock.gzip_requests
+        if rejected:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = self._read_json() if method in ("POST", "PUT") and not rejected else None
+
+        with mock.counters["lock"]:
+            mock.counters["requests"] += 1
+            request_number = mock.counters["requests"]
+
+        if rejected:
+            return self._send_json(415, {"title": "Unsupported Media Type", "detail": "Content-Encoding gzip is not supported"})
+
+        if mock.latency:
+            time.sleep(mock.latency)
+
+        if mock.throttle_every and request_number % mock.throttle_every == 0:
+            with mock.counters["lock"]:
+                mock.counters["throttled"] += 1
+            return self._send_json(429, {"title": "Too Many Requests"}, {"Retry-After": "0"})
+
+        url = urlparse(self.path)
+        path = posixpath.normpath(url.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        try:
+            with mock._lock:
+                status_code, response = self._route(method, path, query, body)
+        except Exception as e:
+            status_code, response = 500, {"title": "Mock server error", "detail": str(e)}
+
+        self._send_json(status_code, response)
+
+    def _route(self, method, path, query, body):
+        mock = self.mock
+
+        if path == SITESHIELD_MAPS_PATH and method == "GET":
+            return 200, {"siteShieldMaps": mock.site_shield_maps}
+
+        match = re.match(rf"^{ACTIVATIONS_PATH}/(\d+)$", path)
+        if match and method == "GET":
+            activation = mock.activations.get(int(match.group(1)))
+            if activation is None:
+                return 404, {"title": "Not Found", "detail": "Activation not found"}
+            return 200, activation
+
+        if path.rstrip("/") == NETWORK_LIST_PATH:
+            if method == "GET":
+                include_elements = query.get("includeElements", "false").lower() == "true"
+                search = query.get("search")
+                network_lists = [
+                    self._format_network_list(network_list, include_elements)
+                    for network_list in mock.network_lists.values()
+                    if not search or search.lower() in network_list["name"].lower()
+                ]
+                return 200, {"networkLists": network_lists, "links": []}
+            if method == "POST":
+                unique_id = f"{3000 + len(mock.network_lists)}_{body['name'].upper()}"
+                mock.add_network_list(unique_id, body.get("type", "IP"), body.get("list", []), body["name"])
+                return 201, self._format_network_list(mock.network_lists[unique_id], True)
+
+        match = re.match(rf"^{NETWORK_LIST_PATH}/([^/]+)(/.*)?$", path)
+        if not match:
+            return 404, {"title": "Not Found", "detail": f"No route for {method} {path}"}
+
+        unique_id, rest = match.group(1), match.group(2) or ""
+        network_list = mock.network_lists.get(unique_id)
+        if network_list is None:
+            return 404, {"title": "Not Found", "detail": f"Network list {unique_id} not found"}
+
+        if rest == "":
+            if method == "GET":
+                return 200, self._format_network_list(network_list, query.get("includeElements", "true").lower() != "false")
+            if method == "PUT":
+                if body.get("syncPoint") != network_list["syncPoint"]:
+                    return 409, {"title": "Conflict", "detail": "The syncPoint does not match the current version of the list"}
+                network_list.update(name=body["name"], description=body.get("description"), list=list(body["list"]))
+                network_list["syncPoint"] += 1
+                return 200, self._format_network_list(network_list, True)
+            if method == "DELETE":
+                del mock.network_lists[unique_id]
+                return 200, {"status": 200, "uniqueId": unique_id}
+
+        if rest == "/append" and method == "POST":
+            present = set(network_list["list"])
+            network_list["list"].extend(element for element in dict.fromkeys(body["list"]) if element not in present)
+            network_list["syncPoint"] += 1
+            return 202, self._format_network_list(network_list, True)
+
+        if rest == "/elements" and method in ("PUT", "DELETE"):
+            element = unquote(query.get("element", ""))
+            if method == "PUT" and element not in network_list["list"]:
+                network_list["list"].append(element)
+            elif method == "DELETE" and element in network_list["list"]:
+                network_list["list"].remove(element)
+            network_list["syncPoint"] += 1
+            return 200, self._format_network_list(network_list, True)
+
+        if rest == "/details" and method == "PUT":
+            network_list.update(name=body["name"], description=body.get("description"))
+            network_list["syncPoint"] += 1
+            return 200, self._format_network_list(network_list, False)
+
+        match = re.match(r"^/sync-points/(\d+)/history$", rest)
+        if match and method == "GET":
+            return 200, self._format_network_list(network_list, True)
+
+        match = re.match(r"^/environments/(PRODUCTION|STAGING)/(activate|status)$", rest)
+        if match:
+            environment, operation = match.groups()
+            if operation == "activate" and method == "POST":
+                activation_id = 5000 + len(mock.activations)
+                mock.activations[activation_id] = {
+                    "activationId": activation_id,
+                    "activationComments": (body or {}).get("comments", ""),
+                    "activationStatus": "ACTIVE",
+                    "syncPoint": network_list["syncPoint"],
+                    "uniqueId": unique_id,
+                    "environment": environment,
+                    "fast": True,
+                    "dispatchCount": 1,
+                }
+                return 200, dict(mock.activations[activation_id], activationStatus="PENDING_ACTIVATION")
+            if operation == "status" and method == "GET":
+                return 200, {
+                    "activationStatus": "ACTIVE",
+                    "syncPoint": network_list["syncPoint"],
+                    "uniqueId": unique_id,
+                    "environment": environment,
+                    "fast": True,
+                    "dispatchCount": 1,
+                }
+
+        return 404, {"title": "Not Found", "detail": f"No route for {method} {path}"}
+
+    @staticmethod
+    def _format_network_list(network_list, include_elements):
+        response = {key: value for key, value in network_list.items() if key != "list"}
+        response["elementCount"] = len(network_list["list"])
+        if include_elements:
+            response["list"] = list(network_list["list"])
+        return response
@@ -0,0 +1,324 @@
+# File: run_benchmarks.py
+#
+# Copyright (c) Robert Drouin, 2021-2026
+#
+# Licensed under Apache 2.0 (https://www.apache.org/licenses/LICENSE-2.0.txt)
+#
+# Runs the connector actions against the local mock Network Lists API and reports, per action,
+# the wall time, the requests issued, the bytes transferred and the peak RSS
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# Metrics compared against a baseline, and whether any increase or only a relative one above the threshold is a regression
+COMPARED_METRICS = {
+    "wall_seconds": "relative",
+    "peak_rss_kb": "relative",
+    "requests": "absolute",
+    "bytes_sent": "relative",
+    "bytes_received": "relative",
+}
+
+
+def _elements(list_index, start, count):
+    from mock_server import MockNetworkListsServer
+
+    return [MockNetworkListsServer.generate_element(list_index, position) for position in range(start, start + count)]
+
+
+def get_scenarios(args, server):
+    """This function is used to build the benchmark scenarios for the data currently served by the mock server.
+
+    :param args: Parsed command line arguments
+    :param server: Populated mock server
+    :return: dictionary of scenario name to (action identifier, action parameters, extra mock server and asset settings)
+    """
+    network_list_ids = server.get_network_list_ids()
+    first_list_id = network_list_ids[0]
+    change_count = max(1, args.num_elements // 10)
+    current = _elements(0, 0, args.num_elements)
+    sync_elements = current[change_count:] + _elements(args.num_lists + 1, 0, change_count)
+    lookup_ips = [_elements(index % args.num_lists, args.num_elements // 2, 1)[0].split("/")[0] for index in range(10)] + ["203.0.113.10"]
+
+    return {
+        "test_connectivity": ("test_connectivity", {}, {}),
+        "list_networks": ("list_networks", {}, {}),
+        "list_networks_elements": ("list_networks", {"includeelements": True}, {}),
+        "get_network": ("get_network", {"networklistid": ",".join(network_list_ids), "includeelements": True}, {}),
+        "get_network_throttled": (
+            "get_network",
+            {"networklistid": ",".join(network_list_ids), "includeelements": True},
+            {"throttle_every": args.throttle_every or 3},
+        ),
+        "add_element": ("add_element", {"networklistid": first_list_id, "elements": ",".join(_elements(args.num_lists, 0, change_count))}, {}),
+        "remove_element": ("remove_element", {"networklistid": first_list_id, "elements": ",".join(current[:change_count])}, {}),
+        "remove_element_compressed": (
+            "remove_element",
+            {"networklistid": first_list_id, "elements": ",".join(current[:change_count])},
+            {"config": {"compress_requests": True}},
+        ),
+        "sync_network": ("sync_network", {"networklistid": first_list_id, "elements": ",".join(sync_elements)}, {}),
+        # Only additions, sent with an append instead of an update of the whole list
+        "sync_network_append": (
+            "sync_network",
+            {"networklistid": first_list_id, "elements": ",".join(current + _elements(args.num_lists + 1, 0, change_count))},
+            {},
+        ),
+        "activation_status": ("activation_status", {"networklistid": first_list_id, "environment": "STAGING"}, {}),
+        "list_siteshields": ("list_siteshields", {}, {}),
+        "lookup_ip": ("lookup_ip", {"ip": ",".join(lookup_ips)}, {}),
+    }
+
+
+def run_worker(spec_path, output_path):
+    """This function is used to run a single action in a fresh interpreter and write its measurements.
+
+    :param spec_path: Path of the JSON file with the action, the parameters and the asset configuration
+    :param output_path: Path of the JSON file the measurements are written to
+    """
+    with open(spec_path) as f:
+        spec = json.load(f)
+
+    sys.path.insert(0, APP_DIR)
+    import_start = time.perf_counter()
+    from akamaiwaf_connector import AkamaiNetworkListsConnector
+
+    import_seconds = time.perf_counter() - import_start
+
+    in_json = {
+        "appid": str(uuid.uuid4()),
+        "identifier": spec["action"],
+        "asset_id": spec["asset_id"],
+        "config": spec["config"],
+        "parameters": [spec["parameters"]],
+    }
+
+    connector = AkamaiNetworkListsConnector()
+    connector.print_progress_message = False
+
+    start = time.perf_counter()
+    connector._handle_action(json.dumps(in_json), None)
+    wall_seconds = time.perf_counter() - start
+
+    action_results = connector.get_action_results()
+    status = all(action_result.get_status() for action_result in action_results) if action_results else False
+    message = action_results[-1].get_message() if action_results else ""
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+
+    with open(output_path, "w") as f:
+        json.dump(
+            {
+                "status": "success" if status else "failed",
+                "message": message,
+                "import_seconds": import_seconds,
+                "wall_seconds": wall_seconds,
+                "peak_rss_kb": peak_rss,
+                "summary": action_results[-1].get_summary() if action_results else {},
+            },
+            f,
+        )
+
+
+def run_scenario(args, server, name, action, parameters, extra):
+    """This function is used to run a scenario args.repeat times, each on freshly populated data and a new asset state.
+
+    :return: dictionary of the median measurements of the runs
+    """
+    runs = []
+    for _ in range(args.repeat):
+        server.populate(num_lists=args.num_lists, num_elements=args.num_elements, num_maps=args.num_maps, num_cidrs=args.num_cidrs)
+        server.throttle_every = extra.get("throttle_every", args.throttle_every)
+        server.reset_counters()
+
+        config = {
+            "base_url": server.base_url,
+            "access_token": "akab-benchmark-access-token",
+            "client_token": "akab-benchmark-client-token",
+            "client_secret": "YmVuY2htYXJrLWNsaWVudC1zZWNyZXQ=",
+            "akamai_verify_ssl": False,
+        }
+        config.update(extra.get("config", {}))
+        config.update(args.config)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            spec_path = os.path.join(temp_dir, "spec.json")
+            output_path = os.path.join(temp_dir, "output.json")
+            with open(spec_path, "w") as f:
+                json.dump({"action": action, "parameters": parameters, "config": config, "asset_id": f"benchmark-{uuid.uuid4().hex}"}, f)
+
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", spec_path, output_path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+            if process.returncode or not os.path.exists(output_path):
+                raise RuntimeError(f"Scenario {name} failed to run:\n{process.stderr}")
+
+            with open(output_path) as f:
+                run = json.load(f)
+
+        # The mock server counts from its side, what it reads was sent by the connector
+        counters = server.get_counters()
+        run.update(
+            requests=counters["requests"], throttled=counters["throttled"], bytes_sent=counters["bytes_in"], bytes_received=counters["bytes_out"]
+        )
+        runs.append(run)
+
+    result = {key: statistics.median(run[key] for run in runs) for key in ("import_seconds", "wall_seconds", "peak_rss_kb")}
+    for key in ("requests", "throttled", "bytes_sent", "bytes_received"):
+        result[key] = max(run[key] for run in runs)
+    result["status"] = "success" if all(run["status"] == "success" for run in runs) else "failed"
+    result["message"] = runs[-1]["message"]
+    return result
+
+
+def compare(results, baseline, threshold):
+    """This function is used to compare results against a baseline.
+
+    :param results: Results of this run
+    :param baseline: Results loaded from a baseline file
+    :param threshold: Relative increase over the baseline above which a metric is a regression
+    :return: list of regression messages
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if previous.get("status") == "success" and result["status"] != "success":
+            regressions.append(f"{name}: status {previous['status']} -> {result['status']}")
+        for metric, kind in COMPARED_METRICS.items():
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if kind == "absolute" and new > old:
+                regressions.append(f"{name}: {metric} {old} -> {new}")
+            elif kind == "relative" and old and (new - old) / old > threshold:
+                regressions.append(f"{name}: {metric} {old:.4g} -> {new:.4g} (+{(new - old) / old:.0%})")
+    return regressions
+
+
+def print_results(results):
+    header = f"{'scenario':<24} {'status':<8} {'wall s':>9} {'import s':>9} {'requests':>9} {'429s':>5} {'KB sent':>9} {'KB recv':>9} {'peak RSS MB':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        print(
+            f"{name:<24} {result['status']:<8} {result['wall_seconds']:>9.4f} {result['import_seconds']:>9.4f} {result['requests']:>9} "
+            f"{result['throttled']:>5} {result['bytes_sent'] / 1024:>9.1f} {result['bytes_received'] / 1024:>9.1f} {result['peak_rss_kb'] / 1024:>12.1f}"
+        )
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark the connector actions against a local mock Network Lists API")
+    argparser.add_argument("--worker", nargs=2, metavar=("SPEC", "OUTPUT"), help=argparse.SUPPRESS)
+    argparser.add_argument("-s", "--scenarios", help="Comma separated scenarios to run, all by default")
+    argparser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per scenario, the median is reported")
+    argparser.add_argument("--num-lists", type=int, default=10, help="Number of network lists served")
+    argparser.add_argument("--num-elements", type=int, default=5000, help="Number of elements of every network list")
+    argparser.add_argument("--num-maps", type=int, default=20, help="Number of site shield maps served")
+    argparser.add_argument("--num-cidrs", type=int, default=200, help="Number of CIDRs of every site shield map")
+    argparser.add_argument("--latency", type=float, default=0, help="Seconds added to every response")
+    argparser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with a 429")
+    argparser.add_argument("--no-gzip-responses", action="store_true", help="Send the response bodies uncompressed")
+    argparser.add_argument("--reject-gzip-requests", action="store_true", help="Answer gzip request bodies with a 415")
+    argparser.add_argument("--config", type=json.loads, default={}, help="JSON object of extra asset configuration")
+    argparser.add_argument("--save", help="Write the results to this JSON file")
+    argparser.add_argument("--compare", help="Compare the results to a JSON file written by --save")
+    argparser.add_argument("--threshold", type=float, default=0.25, help="Relative increase reported as a regression")
+    argparser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    args = argparser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return 0
+
+    sys.path.insert(0, BENCHMARKS_DIR)
+    from mock_server import MockNetworkListsServer
+
+    server = MockNetworkListsServer(
+        latency=args.latency,
+        throttle_every=args.throttle_every,
+        gzip_responses=not args.no_gzip_responses,
+        gzip_requests=not args.reject_gzip_requests,
+    ).start()
+    try:
+        server.populate(num_lists=args.num_lists, num_elements=args.num_elements, num_maps=args.num_maps, num_cidrs=args.num_cidrs)
+        scenarios = get_scenarios(args, server)
+
+        if args.list:
+            print("\n".join(scenarios))
+            return 0
+
+        names = [name.strip() for name in args.scenarios.split(",")] if args.scenarios else list(scenarios)
+        unknown = [name for name in names if name not in scenarios]
+        if unknown:
+            argparser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+        results = {}
+        for name in names:
+            action, parameters, extra = scenarios[name]
+            results[name] = run_scenario(args, server, name, action, parameters, extra)
+    finally:
+        server.stop()
+
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "environment": {"python": platform.python_version(), "platform": platform.platform()},
+                    "options": {
+                        key: getattr(args, key)
+                        for key in (
+                            "repeat",
+                            "num_lists",
+                            "num_elements",
+                            "num_maps",
+                            "num_cidrs",
+                            "latency",
+                            "throttle_every",
+                            "no_gzip_responses",
+                            "reject_gzip_requests",
+                        )
+                    },
+                    "results": results,
+                },
+                f,
+                indent=4,
+            )
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            print("\n".join(f"  {regression}" for regression in regressions))
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())